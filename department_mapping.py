@@ -10,6 +10,9 @@ Utilisation :
     from department_mapping import get_allocine_dept_id, get_all_dept_ids_for_location
 """
 
+import functools
+import unicodedata
+
 # ============================================================================
 # MAPPING PRINCIPAL : Nom Nominatim → ID Allociné
 # ============================================================================
@@ -781,6 +784,21 @@ def normalize_name(name):
     return name.lower().strip()
 
 
+def strip_accents(text):
+    """Supprime les accents (é → e) pour une comparaison insensible aux accents."""
+    return ''.join(
+        c for c in unicodedata.normalize('NFD', text)
+        if unicodedata.category(c) != 'Mn'
+    )
+
+
+# Index sans accents construit une fois : "herault", "ile-de-france"... → ID Allociné
+NOMINATIM_TO_ALLOCINE_NO_ACCENTS = {
+    strip_accents(key): value for key, value in NOMINATIM_TO_ALLOCINE.items()
+}
+
+
+@functools.lru_cache(maxsize=1024)
 def get_allocine_dept_id(nominatim_name):
     """
     Retourne l'ID Allociné pour un nom de département/ville/région Nominatim.
@@ -800,6 +818,11 @@ def get_allocine_dept_id(nominatim_name):
     if normalized in NOMINATIM_TO_ALLOCINE:
         return NOMINATIM_TO_ALLOCINE[normalized]
     
+    # Recherche exacte sans accents (une seule lookup au lieu du parcours)
+    dept_id = NOMINATIM_TO_ALLOCINE_NO_ACCENTS.get(strip_accents(normalized))
+    if dept_id:
+        return dept_id
+    
     # Recherche partielle (le nom Nominatim contient le nom du mapping)
     for key, value in NOMINATIM_TO_ALLOCINE.items():
         if key in normalized or normalized in key:
@@ -0,0 +1,28 @@
+"""
+Configuration gunicorn (chargée automatiquement depuis le répertoire courant).
+
+    gunicorn server_datatourisme_postgres:app
+
+Workers gevent par défaut : les appels OpenAgenda / Nominatim / Allociné / PostgreSQL
+sont des I/O, un worker sert donc de nombreuses requêtes simultanées.
+GUNICORN_WORKER_CLASS=sync (ou gthread) pour revenir à des workers classiques.
+"""
+import os
+
+worker_class = os.environ.get("GUNICORN_WORKER_CLASS", "gevent")
+workers = int(os.environ.get("WEB_CONCURRENCY", 2))
+# Requêtes simultanées par worker gevent. Seules PG_POOL_MAX d'entre elles tiennent
+# une connexion PostgreSQL ; les autres attendent leur tour dans pg_conn
+worker_connections = 200
+
+
+def post_worker_init(worker):
+    """Préchauffe les caches dans chaque worker avant sa première requête."""
+    if worker_class == "gevent":
+        # gunicorn a déjà appliqué monkey.patch_all() ; psycopg2 (extension C)
+        # doit en plus rendre la main au hub gevent pendant les requêtes SQL
+        from psycogreen.gevent import patch_psycopg
+        patch_psycopg()
+
+    from server_datatourisme_postgres import warm_caches
+    warm_caches()
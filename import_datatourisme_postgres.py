@@ -5,20 +5,65 @@ API Flask pour servir les événements DATAtourisme depuis PostgreSQL
 """
 
 from flask import Flask, request, jsonify, send_from_directory
+from flask.json.provider import JSONProvider
 from flask_cors import CORS
 from datetime import datetime, timezone, timedelta
+from decimal import Decimal
 import psycopg2
 from psycopg2.extras import RealDictCursor
+from psycopg2.pool import ThreadedConnectionPool, PoolError
+import contextlib
 import os
 from urllib.parse import urlparse
 import requests
+import orjson
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import math
+import numpy as np
+import time
+import threading
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from cachetools import TTLCache
 
 # ============================================================================
 # CONFIGURATION
 # ============================================================================
 
+# Traces de debug par événement : LOG_LEVEL=DEBUG pour les afficher
+logging.basicConfig(level=os.environ.get("LOG_LEVEL", "INFO").upper(), format="%(message)s")
+logger = logging.getLogger(__name__)
+
+# Scalaires et tableaux NumPy (distances vectorisées) sérialisés directement en C
+ORJSON_OPTIONS = orjson.OPT_SERIALIZE_NUMPY
+
+
+def orjson_default(obj):
+    """Types non gérés nativement par orjson (même rendu que le provider Flask)"""
+    if isinstance(obj, Decimal):
+        return str(obj)
+    raise TypeError
+
+
+class OrjsonProvider(JSONProvider):
+    """Sérialisation JSON via orjson (C) pour jsonify()"""
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, default=orjson_default, option=ORJSON_OPTIONS).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(
+            orjson.dumps(obj, default=orjson_default, option=ORJSON_OPTIONS), mimetype='application/json'
+        )
+
+
 app = Flask(__name__, static_folder='.', static_url_path='')
+app.json = OrjsonProvider(app)
 CORS(app)
 
 # PostgreSQL - Support pour Render et local
@@ -50,40 +95,145 @@ else:
 API_KEY = os.environ.get("OPENAGENDA_API_KEY", "a05c8baab2024ef494d3250fe4fec435")
 BASE_URL = os.environ.get("OPENAGENDA_BASE_URL", "https://api.openagenda.com/v2")
 
+# Sessions HTTP partagées : keep-alive (pas de nouveau handshake TLS par appel) + retries
+class CappedRetry(Retry):
+    """Retry qui respecte Retry-After, mais sans jamais attendre plus de MAX_RETRY_AFTER secondes."""
+    MAX_RETRY_AFTER = 2.0
+
+    def get_retry_after(self, response):
+        retry_after = super().get_retry_after(response)
+        return None if retry_after is None else min(retry_after, self.MAX_RETRY_AFTER)
+
+
+def create_http_session(headers=None, retry=None):
+    """Crée une session requests avec pool de connexions et retries (502/503/504 par défaut)."""
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=32, pool_maxsize=64,
+        max_retries=retry or Retry(total=2, backoff_factor=0.3, status_forcelist=[502, 503, 504])
+    )
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    if headers:
+        session.headers.update(headers)
+    return session
+
+
+HTTP_SESSION = create_http_session()
+# Nominatim : un seul retry court (429 compris) ; une erreur de transport n'est jamais
+# mise en cache par l'appelant, seule une réponse sans résultat l'est
+NOMINATIM_SESSION = create_http_session(
+    {"User-Agent": "datatourisme-openagenda-api/1.0 (eric@ericmahe.com)"},
+    retry=CappedRetry(total=1, backoff_factor=0.5, status_forcelist=[429, 500, 502, 503, 504],
+                      respect_retry_after_header=True)
+)
+NOMINATIM_TIMEOUT = (1.5, 2.5)  # (connexion, lecture) en secondes
+
 # Valeurs par défaut
 RADIUS_KM_DEFAULT = 30
 DAYS_AHEAD_DEFAULT = 30
 
-# Cache simple en mémoire pour les géocodages Nominatim
-GEOCODE_CACHE = {}
+# Bornes de recherche (au-delà, la bbox couvre toute la table)
+MAX_ABS_LAT = 89
+MAX_RADIUS_KM = 5000
+
+# Pool de connexions PostgreSQL (voir get_db_pool), dimensionné par worker ; même
+# défaut que server_datatourisme_postgres. Au-delà de PG_POOL_MAX requêtes
+# simultanées, get_db_connection attend une connexion libre (PG_POOL_WAIT_TIMEOUT au plus)
+PG_POOL_MIN = int(os.environ.get("PG_POOL_MIN", 2))
+PG_POOL_MAX = int(os.environ.get("PG_POOL_MAX", 20))
+PG_POOL_WAIT_TIMEOUT = 10  # secondes
+DB_POOL = None
+DB_POOL_LOCK = threading.Lock()
+DB_POOL_SLOTS = threading.BoundedSemaphore(PG_POOL_MAX)  # une place par connexion du pool
+
+# Cache en mémoire pour les géocodages Nominatim (borné, expire après 24h)
+GEOCODE_CACHE = TTLCache(maxsize=10000, ttl=24 * 3600)
+GEOCODE_CACHE_LOCK = threading.Lock()  # TTLCache n'est pas thread-safe
+
+# Politique Nominatim : 1 requête/s au maximum, 2 géocodages en vol au plus pour les
+# requêtes (NOMINATIM_EXECUTOR), plus 1 en arrière-plan (GEOCODE_BACKGROUND_EXECUTOR)
+NOMINATIM_MIN_INTERVAL = 1.0
+NOMINATIM_MAX_WORKERS = 2
+# Partagé par toutes les requêtes du worker : la borne de 2 vaut pour le processus entier
+NOMINATIM_EXECUTOR = ThreadPoolExecutor(max_workers=NOMINATIM_MAX_WORKERS, thread_name_prefix="nominatim")
+NOMINATIM_THROTTLE = {'last_call': 0.0}
+NOMINATIM_THROTTLE_LOCK = threading.Lock()
+# Au-delà de ce budget par requête, les adresses restantes sont géocodées en
+# arrière-plan (un seul thread) et apparaissent dans les réponses suivantes
+GEOCODE_REQUEST_BUDGET = 8.0  # secondes, depuis le début de fetch_openagenda_events
+GEOCODE_BACKGROUND_EXECUTOR = ThreadPoolExecutor(max_workers=1, thread_name_prefix="geocode")
+GEOCODE_PENDING = set()
+GEOCODE_PENDING_MAX = 2000
+GEOCODE_PENDING_LOCK = threading.Lock()
+
+# Nombre d'agendas OpenAgenda interrogés en parallèle
+OPENAGENDA_MAX_WORKERS = 16
+
+# Liste des agendas OpenAgenda (quasi statique) : mise en cache 10 minutes
+AGENDAS_CACHE_TTL = 600
+AGENDAS_CACHE = {'timestamp': 0.0, 'data': None}
+AGENDAS_CACHE_LOCK = threading.Lock()
 
 
 # ============================================================================
 # FONCTIONS UTILITAIRES
 # ============================================================================
 
+def get_db_pool():
+    """Pool de connexions PostgreSQL partagé par les threads (créé au premier appel)"""
+    global DB_POOL
+    if DB_POOL is None:
+        with DB_POOL_LOCK:
+            if DB_POOL is None:
+                DB_POOL = ThreadedConnectionPool(PG_POOL_MIN, PG_POOL_MAX, **DB_CONFIG, cursor_factory=RealDictCursor)
+    return DB_POOL
+
+
+@contextlib.contextmanager
 def get_db_connection():
-    """Crée une connexion à PostgreSQL"""
-    return psycopg2.connect(**DB_CONFIG, cursor_factory=RealDictCursor)
+    """Emprunte une connexion au pool PostgreSQL (en attendant qu'une se libère) et la rend à la sortie du bloc"""
+    db_pool = get_db_pool()
+    if not DB_POOL_SLOTS.acquire(timeout=PG_POOL_WAIT_TIMEOUT):
+        raise PoolError(f"pool PostgreSQL saturé ({PG_POOL_MAX} connexions) depuis {PG_POOL_WAIT_TIMEOUT}s")
+    try:
+        conn = db_pool.getconn()
+        if conn.closed:
+            # Connexion fermée côté serveur pendant qu'elle dormait dans le pool
+            db_pool.putconn(conn, close=True)
+            conn = db_pool.getconn()
+        broken = False
+        try:
+            yield conn
+            conn.commit()
+        except (psycopg2.OperationalError, psycopg2.InterfaceError):
+            broken = True
+            raise
+        finally:
+            # Une connexion cassée est fermée au lieu d'être rendue au pool
+            db_pool.putconn(conn, close=broken or bool(conn.closed))
+    finally:
+        DB_POOL_SLOTS.release()
 
 
 # ============================================================================
 # FONCTIONS OPENAGENDA (copiées de server.py Gedeon qui fonctionne)
 # ============================================================================
 
+DEG_PER_KM = 180.0 / (math.pi * 6371.0)  # degrés de latitude par km (sphère R = 6371 km)
+
+
 def calculate_bounding_box(lat, lng, radius_km):
     """
     Calculate bounding box coordinates from a center point and radius.
     """
-    EARTH_RADIUS_KM = 6371.0
-    radius_rad = radius_km / EARTH_RADIUS_KM
-    lat_rad = math.radians(lat)
-
-    lat_delta = math.degrees(radius_rad)
-    min_lat = lat - lat_delta
-    max_lat = lat + lat_delta
+    lat_delta = radius_km * DEG_PER_KM
+    min_lat = max(-90.0, lat - lat_delta)
+    max_lat = min(90.0, lat + lat_delta)
 
-    lng_delta = math.degrees(radius_rad / math.cos(lat_rad))
+    # cos(lat) → 0 près des pôles : borner pour éviter une bbox démesurée
+    cos_lat = max(math.cos(math.radians(lat)), 1e-6)
+    lng_delta = min(lat_delta / cos_lat, 180.0)
     min_lng = lng - lng_delta
     max_lng = lng + lng_delta
 
@@ -106,6 +256,33 @@ def haversine_km(lat1, lon1, lat2, lon2):
     return R * c
 
 
+def haversine_km_array(lat, lon, lats, lons):
+    """Distances en km entre un point et des tableaux NumPy de points (vectorisé)."""
+    R = 6371.0
+    phi1 = math.radians(lat)
+    phi2 = np.radians(lats)
+    dphi = phi2 - phi1
+    dlambda = np.radians(lons - lon)
+
+    a = np.sin(dphi / 2) ** 2 + math.cos(phi1) * np.cos(phi2) * np.sin(dlambda / 2) ** 2
+    c = 2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+    return R * c
+
+
+def radius_deltas_deg(center_lat, radius_km):
+    """
+    Écarts max (lat, lon) en degrés d'un point situé à moins de radius_km du centre.
+    Sert de rejet rapide avant haversine_km (même rayon terrestre).
+    """
+    radius_rad = radius_km / 6371.0
+    lat_delta = math.degrees(radius_rad)
+    cos_lat = math.cos(math.radians(center_lat))
+    if cos_lat <= 0 or math.sin(radius_rad) >= cos_lat:
+        return lat_delta, 180.0  # le cercle contient un pôle
+    lon_delta = math.degrees(math.asin(math.sin(radius_rad) / cos_lat))
+    return lat_delta, lon_delta
+
+
 def search_agendas(search_term=None, official=None, limit=100):
     """
     Recherche d'agendas OpenAgenda.
@@ -122,14 +299,31 @@ def search_agendas(search_term=None, official=None, limit=100):
         params["official"] = 1 if official else 0
 
     try:
-        r = requests.get(url, params=params, timeout=15)
+        r = HTTP_SESSION.get(url, params=params, timeout=15)
         r.raise_for_status()
-        return r.json() or {}
-    except requests.exceptions.RequestException as e:
+        return orjson.loads(r.content) or {}
+    except (requests.exceptions.RequestException, orjson.JSONDecodeError) as e:
         print(f"❌ Error searching agendas: {e}")
         return {"agendas": []}
 
 
+def get_cached_agendas():
+    """
+    Résultat de search_agendas(limit=100), mis en cache AGENDAS_CACHE_TTL secondes.
+    Un seul thread rafraîchit le cache, les autres attendent son résultat.
+    """
+    with AGENDAS_CACHE_LOCK:
+        if AGENDAS_CACHE['data'] is not None and time.time() - AGENDAS_CACHE['timestamp'] < AGENDAS_CACHE_TTL:
+            return AGENDAS_CACHE['data']
+
+        agendas_result = search_agendas(limit=100)
+        # Ne pas mettre en cache une erreur (liste vide)
+        if agendas_result and agendas_result.get('agendas'):
+            AGENDAS_CACHE['data'] = agendas_result
+            AGENDAS_CACHE['timestamp'] = time.time()
+        return agendas_result
+
+
 def get_events_from_agenda(agenda_uid, center_lat, center_lon, radius_km, days_ahead, limit=300):
     """
     Récupère les événements d'un agenda avec filtrage géographique et temporel via l'API.
@@ -156,57 +350,147 @@ def get_events_from_agenda(agenda_uid, center_lat, center_lon, radius_km, days_a
     }
 
     try:
-        r = requests.get(url, params=params, timeout=20)
+        r = HTTP_SESSION.get(url, params=params, timeout=20)
         r.raise_for_status()
-        return r.json() or {}
-    except requests.exceptions.RequestException as e:
+        return orjson.loads(r.content) or {}
+    except (requests.exceptions.RequestException, orjson.JSONDecodeError) as e:
         print(f"❌ Error fetching events from agenda {agenda_uid}: {e}")
         return {"events": []}
 
 
-def geocode_address_nominatim(address_str):
+def wait_nominatim_slot(deadline=None):
+    """
+    Réserve puis attend le prochain créneau Nominatim (1 requête/s max, tous threads confondus).
+    Retourne False sans rien réserver si ce créneau tombe après deadline (time.monotonic())
+    """
+    with NOMINATIM_THROTTLE_LOCK:
+        slot = max(time.monotonic(), NOMINATIM_THROTTLE['last_call'] + NOMINATIM_MIN_INTERVAL)
+        if deadline is not None and slot > deadline:
+            return False
+        NOMINATIM_THROTTLE['last_call'] = slot
+    wait = slot - time.monotonic()
+    if wait > 0:
+        time.sleep(wait)
+    return True
+
+
+def geocode_cache_key(address_str):
+    """Clé de cache d'une adresse : casse et espaces normalisés"""
+    return " ".join(address_str.lower().split())
+
+
+def schedule_background_geocode(address_str):
+    """Géocode l'adresse plus tard, hors requête (une seule fois même si demandée souvent)"""
+    key = geocode_cache_key(address_str)
+    with GEOCODE_PENDING_LOCK:
+        if key in GEOCODE_PENDING or len(GEOCODE_PENDING) >= GEOCODE_PENDING_MAX:
+            return
+        GEOCODE_PENDING.add(key)
+
+    def run():
+        try:
+            geocode_address_nominatim(address_str)
+        finally:
+            with GEOCODE_PENDING_LOCK:
+                GEOCODE_PENDING.discard(key)
+
+    GEOCODE_BACKGROUND_EXECUTOR.submit(run)
+
+
+def geocode_address_nominatim(address_str, deadline=None):
     """
     Géocode une adresse texte avec Nominatim (OpenStreetMap).
+    Avec deadline, une adresse sans créneau libre à temps est géocodée en arrière-plan
+    et (None, None) est retourné.
     """
     if not address_str:
         return None, None
 
-    if address_str in GEOCODE_CACHE:
-        return GEOCODE_CACHE[address_str]
+    cache_key = geocode_cache_key(address_str)
+    with GEOCODE_CACHE_LOCK:
+        cached = GEOCODE_CACHE.get(cache_key)
+    if cached is not None:
+        return cached
 
+    if not wait_nominatim_slot(deadline):
+        schedule_background_geocode(address_str)
+        return None, None
     url = "https://nominatim.openstreetmap.org/search"
     params = {
         "q": address_str,
         "format": "json",
         "limit": 1
     }
-    headers = {
-        "User-Agent": "datatourisme-openagenda-api/1.0 (eric@ericmahe.com)"
-    }
 
     try:
-        r = requests.get(url, params=params, headers=headers, timeout=10)
+        r = NOMINATIM_SESSION.get(url, params=params, timeout=NOMINATIM_TIMEOUT)
         r.raise_for_status()
-        data = r.json()
+        data = orjson.loads(r.content)
         if not data:
-            GEOCODE_CACHE[address_str] = (None, None)
+            with GEOCODE_CACHE_LOCK:
+                GEOCODE_CACHE[cache_key] = (None, None)
             return None, None
 
         lat = float(data[0]["lat"])
         lon = float(data[0]["lon"])
-        GEOCODE_CACHE[address_str] = (lat, lon)
+        with GEOCODE_CACHE_LOCK:
+            GEOCODE_CACHE[cache_key] = (lat, lon)
         print(f"🌍 Nominatim geocode OK: '{address_str}' -> ({lat}, {lon})")
         return lat, lon
     except requests.RequestException as e:
+        # Panne passagère (timeout, 429, 5xx) : pas de cache, adresse retentée au prochain appel
         print(f"❌ Nominatim error for '{address_str}': {e}")
-        GEOCODE_CACHE[address_str] = (None, None)
         return None, None
     except (KeyError, ValueError) as e:
         print(f"❌ Nominatim parse error for '{address_str}': {e}")
-        GEOCODE_CACHE[address_str] = (None, None)
         return None, None
 
 
+def location_address(loc):
+    """
+    Adresse texte d'une localisation OpenAgenda, pour le géocodage Nominatim.
+    """
+    parts = []
+    if loc.get("name"):
+        parts.append(str(loc["name"]))
+    if loc.get("address"):
+        parts.append(str(loc["address"]))
+    if loc.get("city"):
+        parts.append(str(loc["city"]))
+    parts.append("France")
+    return ", ".join(parts)
+
+
+def format_agenda_event(ev, loc, ev_lat, ev_lon, begin_str, end_str, agenda_slug, agenda_title, distance_km):
+    """Événement OpenAgenda au format de l'API, construit en un seul dict."""
+    title_field = ev.get('title')
+    if isinstance(title_field, dict):
+        ev_title = title_field.get('fr') or title_field.get('en') or 'Événement'
+    else:
+        ev_title = title_field or 'Événement'
+
+    event_slug = ev.get('slug')
+    openagenda_url = None
+    if agenda_slug and event_slug:
+        openagenda_url = f"https://openagenda.com/{agenda_slug}/events/{event_slug}?lang=fr"
+
+    return {
+        "uid": f"oa-{ev.get('uid')}",
+        "title": ev_title,
+        "begin": begin_str,
+        "end": end_str,
+        "locationName": loc.get("name"),
+        "city": loc.get("city"),
+        "address": loc.get("address"),
+        "latitude": ev_lat,
+        "longitude": ev_lon,
+        "distanceKm": distance_km,
+        "openagendaUrl": openagenda_url,
+        "agendaTitle": agenda_title,
+        "source": "OpenAgenda"
+    }
+
+
 def fetch_openagenda_events(center_lat, center_lon, radius_km, days_ahead):
     """
     Récupère tous les événements OpenAgenda à proximité.
@@ -214,9 +498,11 @@ def fetch_openagenda_events(center_lat, center_lon, radius_km, days_ahead):
     (Logique copiée de server.py Gedeon)
     """
     print(f"🔍 OpenAgenda: Recherche autour de ({center_lat}, {center_lon}), rayon={radius_km}km, jours={days_ahead}")
+    # Échéance des géocodages Nominatim faits pendant la requête
+    geocode_deadline = time.monotonic() + GEOCODE_REQUEST_BUDGET
 
     # Recherche d'agendas
-    agendas_result = search_agendas(limit=100)
+    agendas_result = get_cached_agendas()
     agendas = agendas_result.get('agendas', []) if agendas_result else []
     total_agendas = len(agendas)
 
@@ -225,9 +511,37 @@ def fetch_openagenda_events(center_lat, center_lon, radius_km, days_ahead):
     if not agendas:
         return []
 
-    all_events = []
+    # Événements dans la bounding box ; distance et rayon vérifiés ensuite en une passe
+    candidates = []
+    # Marge de 1e-9° pour les erreurs d'arrondi
+    lat_delta, lon_delta = (d + 1e-9 for d in radius_deltas_deg(center_lat, radius_km))
+
+    # Appels HTTP en parallèle ; les résultats sont traités dans l'ordre des agendas
+    def fetch_agenda(agenda):
+        return get_events_from_agenda(agenda.get('uid'), center_lat, center_lon, radius_km, days_ahead, limit=300)
+
+    with ThreadPoolExecutor(max_workers=OPENAGENDA_MAX_WORKERS) as executor:
+        agendas_events_data = list(executor.map(fetch_agenda, agendas))
+
+    # Adresses des événements sans lat/lon, géocodées en parallèle (débit limité)
+    addresses = []
+    for events_data in agendas_events_data:
+        for ev in (events_data.get('events', []) if events_data else []):
+            loc = ev.get('location') or {}
+            if loc.get('latitude') is None or loc.get('longitude') is None:
+                addresses.append(location_address(loc))
+    addresses = list(dict.fromkeys(addresses))
+
+    geocoded = {}
+    if addresses:
+        print(f"🌍 Nominatim: {len(addresses)} adresses à géocoder")
+        geocoded = dict(zip(addresses, NOMINATIM_EXECUTOR.map(
+            geocode_address_nominatim, addresses, [geocode_deadline] * len(addresses))))
 
-    for idx, agenda in enumerate(agendas):
+    # Un même événement peut être relayé par plusieurs agendas : clé (uid, début)
+    seen = set()
+
+    for idx, (agenda, events_data) in enumerate(zip(agendas, agendas_events_data)):
         uid = agenda.get('uid')
         agenda_slug = agenda.get('slug')
         title = agenda.get('title', {})
@@ -238,7 +552,6 @@ def fetch_openagenda_events(center_lat, center_lon, radius_km, days_ahead):
 
         print(f"📖 [{idx+1}/{total_agendas}] Agenda: {agenda_title} ({uid})")
 
-        events_data = get_events_from_agenda(uid, center_lat, center_lon, radius_km, days_ahead, limit=300)
         events = events_data.get('events', []) if events_data else []
 
         print(f"   → {len(events)} événements retournés par l'API")
@@ -253,29 +566,24 @@ def fetch_openagenda_events(center_lat, center_lon, radius_km, days_ahead):
                 begin_str = first_timing.get('begin')
                 end_str = first_timing.get('end')
 
+            key = (ev.get('uid'), begin_str)
+            if key in seen:
+                continue
+            seen.add(key)
+
             # Récupération de la localisation
             loc = ev.get('location') or {}
             ev_lat = loc.get('latitude')
             ev_lon = loc.get('longitude')
 
-            # Si OpenAgenda ne fournit pas de lat/lon, on tente Nominatim
+            # Si OpenAgenda ne fournit pas de lat/lon, on prend le géocodage Nominatim
             if ev_lat is None or ev_lon is None:
-                parts = []
-                if loc.get("name"):
-                    parts.append(str(loc["name"]))
-                if loc.get("address"):
-                    parts.append(str(loc["address"]))
-                if loc.get("city"):
-                    parts.append(str(loc["city"]))
-                parts.append("France")
-                address_str = ", ".join(parts)
-
-                geocoded_lat, geocoded_lon = geocode_address_nominatim(address_str)
+                geocoded_lat, geocoded_lon = geocoded[location_address(loc)]
                 if geocoded_lat is not None and geocoded_lon is not None:
                     ev_lat = geocoded_lat
                     ev_lon = geocoded_lon
                 else:
-                    print(f"   ⚠️  Pas de coordonnées pour: {ev.get('title', 'Sans titre')}")
+                    logger.debug("   ⚠️  Pas de coordonnées pour: %s", ev.get('title', 'Sans titre'))
                     continue
 
             try:
@@ -284,45 +592,125 @@ def fetch_openagenda_events(center_lat, center_lon, radius_km, days_ahead):
             except ValueError:
                 continue
 
-            # Calcul de la distance exacte
-            dist = haversine_km(center_lat, center_lon, ev_lat, ev_lon)
-
-            # Vérification finale du rayon
-            if dist > radius_km:
+            # Rejet rapide hors bounding box (sans trigonométrie)
+            dlon = abs(ev_lon - center_lon)
+            if abs(ev_lat - center_lat) > lat_delta or min(dlon, 360.0 - dlon) > lon_delta:
                 continue
 
-            title_field = ev.get('title')
-            if isinstance(title_field, dict):
-                ev_title = title_field.get('fr') or title_field.get('en') or 'Événement'
-            else:
-                ev_title = title_field or 'Événement'
-
-            # slug de l'événement
-            event_slug = ev.get('slug')
-            openagenda_url = None
-            if agenda_slug and event_slug:
-                openagenda_url = f"https://openagenda.com/{agenda_slug}/events/{event_slug}?lang=fr"
-
-            all_events.append({
-                "uid": f"oa-{ev.get('uid')}",
-                "title": ev_title,
-                "begin": begin_str,
-                "end": end_str,
-                "locationName": loc.get("name"),
-                "city": loc.get("city"),
-                "address": loc.get("address"),
-                "latitude": ev_lat,
-                "longitude": ev_lon,
-                "distanceKm": round(dist, 1),
-                "openagendaUrl": openagenda_url,
-                "agendaTitle": agenda_title,
-                "source": "OpenAgenda"
-            })
+            # Mise en forme différée : seuls les événements dans le rayon la paient
+            candidates.append((ev, loc, ev_lat, ev_lon, begin_str, end_str, agenda_slug, agenda_title))
+
+    # Distances exactes de tous les candidats en un seul calcul NumPy
+    all_events = []
+    if candidates:
+        dists = haversine_km_array(
+            center_lat, center_lon,
+            np.fromiter((c[2] for c in candidates), dtype=np.float64, count=len(candidates)),
+            np.fromiter((c[3] for c in candidates), dtype=np.float64, count=len(candidates))
+        )
+        for candidate, dist in zip(candidates, dists.tolist()):
+            # Vérification finale du rayon
+            if dist <= radius_km:
+                all_events.append(format_agenda_event(*candidate, round(dist, 1)))
 
     print(f"✅ OpenAgenda: {len(all_events)} événements trouvés au total")
     return all_events
 
 
+# ============================================================================
+# FONCTIONS DATATOURISME
+# ============================================================================
+
+# Colonnes de la requête DATAtourisme, dans l'ordre du SELECT (= clés du JSON)
+DATATOURISME_EVENT_COLS = (
+    'uid', 'title', 'description', 'begin', 'end', 'latitude', 'longitude',
+    'address', 'city', 'postalCode', 'contacts', 'distanceKm',
+    'locationName', 'source', 'agendaTitle', 'openagendaUrl',
+)
+
+
+def query_datatourisme_events(center_lat, center_lon, radius_km, date_limite):
+    """
+    Événements DATAtourisme (PostgreSQL) dans le rayon, jusqu'à date_limite.
+    Les champs sont mis en forme par PostgreSQL (dates ISO, distance arrondie,
+    URL extraite des contacts) : chaque ligne est directement prête pour le JSON.
+    Les lignes sont triées comme le tri final de get_nearby_events.
+    """
+    with get_db_connection() as conn:
+        # Curseur nommé (côté serveur) : les lignes arrivent par lots de itersize.
+        # Lignes en tuples (pas de RealDictCursor), zippées avec DATATOURISME_EVENT_COLS
+        cur = conn.cursor(name='nearby_cur', cursor_factory=psycopg2.extensions.cursor)
+        cur.itersize = 200
+        
+        query = """
+            WITH nearby_events AS (
+                SELECT uri, nom, description, date_debut, date_fin,
+                       latitude, longitude, adresse, commune, code_postal, contacts,
+                       ST_Distance(
+                           geog,
+                           ST_MakePoint(%s, %s)::geography,
+                           false
+                       ) / 1000 as dist_km
+                FROM evenements
+                WHERE ST_DWithin(
+                    geog,
+                    ST_MakePoint(%s, %s)::geography,
+                    %s,
+                    false
+                )
+                AND (date_debut IS NULL OR date_debut <= %s)
+                AND (date_fin IS NULL OR date_fin >= CURRENT_DATE)
+                ORDER BY dist_km, date_debut
+                LIMIT 500
+            )
+            SELECT 
+                uri as uid,
+                nom as title,
+                description,
+                to_json(date_debut) #>> '{}' as begin,
+                to_json(date_fin) #>> '{}' as end,
+                latitude,
+                longitude,
+                adresse as address,
+                commune as city,
+                code_postal as "postalCode",
+                contacts,
+                ROUND(dist_km::numeric, 1)::float8 as "distanceKm",
+                commune as "locationName",
+                'DATAtourisme' as source,
+                'DATAtourisme National' as "agendaTitle",
+                COALESCE(
+                    CASE WHEN strpos(contacts, '#') > 0
+                         THEN (regexp_match(contacts, '(?:^|#)(http[^#]*)'))[1]
+                    END, ''
+                ) as "openagendaUrl"
+            FROM nearby_events
+            ORDER BY "distanceKm", date_debut NULLS FIRST
+        """
+        
+        cur.execute(query, (
+            center_lon, center_lat,
+            center_lon, center_lat,
+            radius_km * 1000,
+            date_limite
+        ))
+        
+        events = [dict(zip(DATATOURISME_EVENT_COLS, row)) for row in cur]
+        
+        cur.close()
+
+    return events
+
+
+def event_sort_key(event):
+    """
+    Clé du tri final : distance (absente en dernier, 0.0 en tête), puis date de début
+    (absente en tête). Même ordre que l'ORDER BY de la requête DATAtourisme
+    """
+    distance = event.get("distanceKm")
+    return (distance if distance is not None else 999, event.get("begin") or "")
+
+
 # ============================================================================
 # ROUTES
 # ============================================================================
@@ -352,6 +740,12 @@ def get_nearby_events():
                 "message": "Paramètres 'lat' et 'lon' requis"
             }), 400
         
+        if abs(center_lat) > MAX_ABS_LAT or radius_km > MAX_RADIUS_KM:
+            return jsonify({
+                "status": "error",
+                "message": f"'lat' doit être dans ±{MAX_ABS_LAT}° et 'radiusKm' ≤ {MAX_RADIUS_KM}"
+            }), 400
+        
         print(f"🔍 Recherche combinée: ({center_lat}, {center_lon}), rayon={radius_km}km, jours={days_ahead}")
         
         date_limite = datetime.now().date() + timedelta(days=days_ahead)
@@ -360,96 +754,38 @@ def get_nearby_events():
         datatourisme_count = 0
         openagenda_count = 0
         
-        # ========== 1. DATAtourisme (PostgreSQL) ==========
-        try:
-            conn = get_db_connection()
-            cur = conn.cursor()
-            
-            query = """
-                SELECT 
-                    uri as uid,
-                    nom as title,
-                    description,
-                    date_debut as begin,
-                    date_fin as end,
-                    latitude,
-                    longitude,
-                    adresse as address,
-                    commune as city,
-                    code_postal as "postalCode",
-                    contacts,
-                    ST_Distance(
-                        geom::geography,
-                        ST_SetSRID(ST_MakePoint(%s, %s), 4326)::geography
-                    ) / 1000 as "distanceKm"
-                FROM evenements
-                WHERE ST_DWithin(
-                    geom::geography,
-                    ST_SetSRID(ST_MakePoint(%s, %s), 4326)::geography,
-                    %s
-                )
-                AND (date_debut IS NULL OR date_debut <= %s)
-                AND (date_fin IS NULL OR date_fin >= CURRENT_DATE)
-                ORDER BY "distanceKm", date_debut
-                LIMIT 500
-            """
+        # ========== 1 + 2. DATAtourisme et OpenAgenda en parallèle ==========
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            future_dt = executor.submit(query_datatourisme_events, center_lat, center_lon, radius_km, date_limite)
+            future_oa = executor.submit(fetch_openagenda_events, center_lat, center_lon, radius_km, days_ahead)
             
-            cur.execute(query, (
-                center_lon, center_lat,
-                center_lon, center_lat,
-                radius_km * 1000,
-                date_limite
-            ))
-            
-            rows = cur.fetchall()
-            
-            for row in rows:
-                event = dict(row)
-                
-                if event.get('begin'):
-                    event['begin'] = event['begin'].isoformat()
-                if event.get('end'):
-                    event['end'] = event['end'].isoformat()
-                
-                if event.get('distanceKm'):
-                    event['distanceKm'] = round(event['distanceKm'], 1)
-                
-                event['locationName'] = event.get('city', '')
-                event['source'] = 'DATAtourisme'
-                event['agendaTitle'] = 'DATAtourisme National'
-                
-                contacts = event.get('contacts', '')
-                event['openagendaUrl'] = ''
-                if contacts and '#' in contacts:
-                    parts = contacts.split('#')
-                    for part in parts:
-                        if part.startswith('http'):
-                            event['openagendaUrl'] = part
-                            break
-                
-                all_events.append(event)
-            
-            datatourisme_count = len(rows)
-            cur.close()
-            conn.close()
-            
-            print(f"✅ DATAtourisme: {datatourisme_count} événements trouvés")
+            try:
+                datatourisme_events = future_dt.result()
+                datatourisme_count = len(datatourisme_events)
+                all_events.extend(datatourisme_events)
+                print(f"✅ DATAtourisme: {datatourisme_count} événements trouvés")
+            except psycopg2.Error as e:
+                print(f"⚠️ Erreur PostgreSQL (DATAtourisme): {e}")
             
-        except psycopg2.Error as e:
-            print(f"⚠️ Erreur PostgreSQL (DATAtourisme): {e}")
-        
-        # ========== 2. OpenAgenda ==========
-        try:
-            openagenda_events = fetch_openagenda_events(center_lat, center_lon, radius_km, days_ahead)
-            openagenda_count = len(openagenda_events)
-            all_events.extend(openagenda_events)
-        except Exception as e:
-            print(f"⚠️ Erreur OpenAgenda: {e}")
-            import traceback
-            traceback.print_exc()
+            try:
+                openagenda_events = future_oa.result()
+                openagenda_count = len(openagenda_events)
+                all_events.extend(openagenda_events)
+            except Exception as e:
+                print(f"⚠️ Erreur OpenAgenda: {e}")
+                import traceback
+                traceback.print_exc()
         
-        # ========== 3. Tri par distance puis date ==========
-        all_events.sort(key=lambda e: (e.get("distanceKm") or 999, e.get("begin") or ""))
+        # ========== 3. Dédoublonnage puis tri par distance et date ==========
+        seen = set()
+        unique_events = []
+        for event in all_events:
+            key = (event["source"], event["uid"])
+            if key not in seen:
+                seen.add(key)
+                unique_events.append(event)
+        all_events = unique_events
+        all_events.sort(key=event_sort_key)
         
         print(f"✅ Total combiné: {len(all_events)} événements (DATAtourisme: {datatourisme_count}, OpenAgenda: {openagenda_count})")
         
@@ -482,37 +818,43 @@ def get_stats():
     """Retourne des statistiques sur la base"""
     
     try:
-        conn = get_db_connection()
-        cur = conn.cursor()
-        
-        cur.execute("SELECT COUNT(*) as total FROM evenements")
-        total = cur.fetchone()['total']
-        
-        cur.execute("""
-            SELECT COUNT(*) as count
-            FROM evenements
-            WHERE date_debut >= CURRENT_DATE
-        """)
-        futurs = cur.fetchone()['count']
-        
-        cur.execute("""
-            SELECT commune, COUNT(*) as count
-            FROM evenements
-            WHERE commune IS NOT NULL
-            GROUP BY commune
-            ORDER BY count DESC
-            LIMIT 10
-        """)
-        top_communes = cur.fetchall()
-        
-        cur.close()
-        conn.close()
+        with get_db_connection() as conn:
+            cur = conn.cursor()
+            
+            # Total et événements à venir en un seul parcours de la table
+            cur.execute("""
+                SELECT
+                    COUNT(*) as total,
+                    COUNT(*) FILTER (WHERE date_debut >= CURRENT_DATE) as count
+                FROM evenements
+            """)
+            counts = cur.fetchone()
+            total, futurs = counts['total'], counts['count']
+            
+            # Liste déjà sérialisée en JSON par PostgreSQL, insérée telle quelle (orjson.Fragment)
+            cur.execute("""
+                SELECT COALESCE(
+                    json_agg(json_build_object('commune', commune, 'count', count) ORDER BY count DESC),
+                    '[]'
+                )::text AS top_communes
+                FROM (
+                    SELECT commune, COUNT(*) as count
+                    FROM evenements
+                    WHERE commune IS NOT NULL
+                    GROUP BY commune
+                    ORDER BY count DESC
+                    LIMIT 10
+                ) t
+            """)
+            top_communes = orjson.Fragment(cur.fetchone()['top_communes'])
+            
+            cur.close()
         
         return jsonify({
             "status": "success",
             "total_events": total,
             "upcoming_events": futurs,
-            "top_communes": [dict(row) for row in top_communes],
+            "top_communes": top_communes,
             "sources": ["DATAtourisme", "OpenAgenda"]
         }), 200
         
@@ -529,11 +871,10 @@ def health():
     """Endpoint de santé"""
     
     try:
-        conn = get_db_connection()
-        cur = conn.cursor()
-        cur.execute("SELECT 1")
-        cur.close()
-        conn.close()
+        with get_db_connection() as conn:
+            cur = conn.cursor()
+            cur.execute("SELECT 1")
+            cur.close()
         
         return jsonify({
             "status": "healthy",
@@ -567,4 +908,6 @@ if __name__ == '__main__':
     print("="*70)
     print()
     
-    app.run(host='0.0.0.0', port=port, debug=True)
+    # Serveur de développement uniquement (en production : gunicorn, cf. gunicorn.conf.py).
+    # FLASK_DEBUG=1 active le debugger et le rechargement automatique.
+    app.run(host='0.0.0.0', port=port, debug=os.environ.get("FLASK_DEBUG", "0") == "1", threaded=True)
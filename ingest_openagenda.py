@@ -0,0 +1,13 @@
+"""
+Ingestion OpenAgenda en table (OPENAGENDA_INGEST=1, migration 003).
+
+    python ingest_openagenda.py
+
+Processus séparé des workers web (service « Background Worker » sur Render) :
+les appels OpenAgenda et les géocodages Nominatim de l'ingestion, longs,
+n'occupent ni un worker gunicorn ni une connexion de son pool.
+"""
+from server_datatourisme_postgres import openagenda_ingest_loop
+
+if __name__ == '__main__':
+    openagenda_ingest_loop()
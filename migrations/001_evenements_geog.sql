@@ -0,0 +1,17 @@
+-- ============================================================================
+-- 001 : colonne geography précalculée pour les recherches de proximité
+-- ============================================================================
+--
+-- Le cast geom::geography est calculé une fois à l'écriture au lieu d'être
+-- refait sur chaque ligne à chaque requête /api/events/nearby.
+-- L'index GIST sur geog est utilisé directement par ST_DWithin.
+--
+-- Usage : psql "$DATABASE_URL" -f migrations/001_evenements_geog.sql
+
+ALTER TABLE evenements
+    ADD COLUMN IF NOT EXISTS geog geography(Point, 4326)
+    GENERATED ALWAYS AS (geom::geography) STORED;
+
+CREATE INDEX IF NOT EXISTS evenements_geog_gix ON evenements USING GIST (geog);
+
+ANALYZE evenements;
@@ -0,0 +1,16 @@
+-- ============================================================================
+-- 002 : index sur les dates pour le filtre "événements à venir"
+-- ============================================================================
+--
+-- /api/events/nearby filtre sur date_fin >= CURRENT_DATE et date_debut <= limite.
+-- Un index partiel "WHERE date_fin >= CURRENT_DATE" est impossible (prédicat
+-- non immuable) : on indexe donc les deux colonnes de date.
+-- Le tri par distance utilise l'index GIST de la migration 001 (KNN <->).
+--
+-- Usage : psql "$DATABASE_URL" -f migrations/002_evenements_dates.sql
+
+CREATE INDEX IF NOT EXISTS evenements_date_fin_idx ON evenements (date_fin);
+
+CREATE INDEX IF NOT EXISTS evenements_date_debut_idx ON evenements (date_debut);
+
+ANALYZE evenements;
@@ -0,0 +1,35 @@
+-- ============================================================================
+-- 003 : table openagenda_events alimentée par l'ingestion de fond
+-- ============================================================================
+--
+-- Avec OPENAGENDA_INGEST=1, un worker rafraîchit cette table toutes les heures
+-- (ingest_openagenda_events) et /api/events/nearby la lit au lieu d'appeler
+-- OpenAgenda et Nominatim à chaque requête.
+-- "begin"/"end" gardent le texte ISO d'OpenAgenda (avec son fuseau) pour la
+-- réponse JSON (prochaine séance) ; begin_at/end_at servent aux filtres de date
+-- (end_at = fin de la dernière séance d'un événement récurrent).
+--
+-- Usage : psql "$DATABASE_URL" -f migrations/003_openagenda_events.sql
+
+CREATE TABLE IF NOT EXISTS openagenda_events (
+    uid            text PRIMARY KEY,
+    title          text,
+    "begin"        text,
+    "end"          text,
+    begin_at       timestamptz,
+    end_at         timestamptz,
+    location_name  text,
+    city           text,
+    address        text,
+    latitude       double precision NOT NULL,
+    longitude      double precision NOT NULL,
+    openagenda_url text,
+    agenda_title   text,
+    updated_at     timestamptz NOT NULL DEFAULT now(),
+    geog           geography(Point, 4326)
+        GENERATED ALWAYS AS (ST_SetSRID(ST_MakePoint(longitude, latitude), 4326)::geography) STORED
+);
+
+CREATE INDEX IF NOT EXISTS openagenda_events_geog_gix ON openagenda_events USING GIST (geog);
+
+CREATE INDEX IF NOT EXISTS openagenda_events_end_at_idx ON openagenda_events (end_at);
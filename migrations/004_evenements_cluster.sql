@@ -0,0 +1,18 @@
+-- ============================================================================
+-- 004 : table evenements rangée sur disque par geohash
+-- ============================================================================
+--
+-- Les événements proches géographiquement deviennent voisins dans les pages
+-- de la table : une recherche /api/events/nearby lit quelques pages contiguës
+-- au lieu de pages dispersées dans toute la table.
+-- CLUSTER est ponctuel (les lignes insérées ensuite ne sont pas rangées) et
+-- verrouille la table pendant l'opération : à relancer après un import complet,
+-- hors trafic, avec simplement `CLUSTER evenements;` (l'index est mémorisé).
+--
+-- Usage : psql "$DATABASE_URL" -f migrations/004_evenements_cluster.sql
+
+CREATE INDEX IF NOT EXISTS evenements_geohash_idx ON evenements (ST_GeoHash(geom, 10));
+
+CLUSTER evenements USING evenements_geohash_idx;
+
+ANALYZE evenements;
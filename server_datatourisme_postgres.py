@@ -12,18 +12,33 @@ Optimisations :
 """
 
 from flask import Flask, request, jsonify, send_from_directory
+from flask.json.provider import JSONProvider
 from flask_cors import CORS
 from datetime import datetime, timezone, timedelta, date
+from decimal import Decimal
 import psycopg2
-from psycopg2.extras import RealDictCursor
+from psycopg2.extras import RealDictCursor, execute_values
+from psycopg2.pool import ThreadedConnectionPool, PoolError
+import contextlib
 import os
-import json
 from urllib.parse import urlparse
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import math
+import re
+import functools
+import unicodedata
 import time
+import threading
 import pickle
-from concurrent.futures import ThreadPoolExecutor, as_completed
+import logging
+import gzip
+import orjson
+import numpy as np
+from rapidfuzz import process, fuzz
+from cachetools import TTLCache
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait as wait_futures
 
 # ============================================================================
 # IMPORT DES MODULES OPTIMISÉS
@@ -49,17 +64,60 @@ except ImportError:
     ALLOCINE_AVAILABLE = False
     print("⚠️ Allociné API non disponible")
 
+try:
+    import redis
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+
+try:
+    import diskcache
+    DISKCACHE_AVAILABLE = True
+except ImportError:
+    DISKCACHE_AVAILABLE = False
+
 # ============================================================================
-# MAPPING DYNAMIQUE ALLOCINÉ (chargé au démarrage)
+# MAPPING DYNAMIQUE ALLOCINÉ (chargé au premier usage)
 # ============================================================================
 
+# Une instance allocineAPI par thread, réutilisée d'un appel à l'autre
+# (la bibliothèque ne garantit pas qu'une instance soit partageable entre threads)
+ALLOCINE_API_LOCAL = threading.local()
+
+
+def get_allocine_api():
+    """Instance allocineAPI du thread courant (créée au premier appel)."""
+    api = getattr(ALLOCINE_API_LOCAL, 'api', None)
+    if api is None:
+        api = ALLOCINE_API_LOCAL.api = allocineAPI()
+    return api
+
+
+def get_allocine_departements():
+    """Liste des départements Allociné (get_departements), mise en cache 1h."""
+    with ALLOCINE_CACHE_LOCK:
+        depts = ALLOCINE_DEPTS_CACHE.get('depts')
+    if depts is None:
+        depts = get_allocine_api().get_departements()
+        with ALLOCINE_CACHE_LOCK:
+            ALLOCINE_DEPTS_CACHE['depts'] = depts
+    return depts
+
+
 ALLOCINE_DEPT_MAPPING = {}  # nom_normalisé → id_allocine
 ALLOCINE_DEPT_MAPPING_LOADED = False
+ALLOCINE_DEPT_LOCK = threading.Lock()
+# Chargé au premier usage, dans un thread de fond : aucun appel Allociné au démarrage
+# des workers, et un Allociné lent ne retarde pas une requête au-delà de
+# ALLOCINE_DEPTS_TIMEOUT secondes
+ALLOCINE_DEPTS_TIMEOUT = 5
+ALLOCINE_DEPT_THREAD = None
+ALLOCINE_DEPT_THREAD_LOCK = threading.Lock()
 
 def load_allocine_departments():
     """
-    Charge le mapping des départements depuis l'API Allociné.
-    Appelé une fois au démarrage du serveur.
+    Charge le mapping des départements depuis l'API Allociné (appel réseau bloquant).
+    Lancé en arrière-plan par start_loading_allocine_departments(), au premier usage.
     """
     global ALLOCINE_DEPT_MAPPING, ALLOCINE_DEPT_MAPPING_LOADED
     
@@ -70,46 +128,69 @@ def load_allocine_departments():
     if ALLOCINE_DEPT_MAPPING_LOADED:
         return
     
-    try:
-        print("   🔄 Chargement des départements Allociné...")
-        api = allocineAPI()
-        depts = api.get_departements()
+    # Un seul thread interroge l'API, les autres attendent le résultat
+    with ALLOCINE_DEPT_LOCK:
+        if ALLOCINE_DEPT_MAPPING_LOADED:
+            return
         
-        for dept in depts:
-            name = dept.get('name', '')
-            dept_id = dept.get('id', '')
+        try:
+            print("   🔄 Chargement des départements Allociné...")
+            depts = get_allocine_departements()
             
-            if name and dept_id:
-                # Normaliser le nom (minuscules, sans accents problématiques)
-                name_normalized = name.lower().strip()
-                ALLOCINE_DEPT_MAPPING[name_normalized] = dept_id
+            mapping = {}
+            for dept in depts:
+                name = dept.get('name', '')
+                dept_id = dept.get('id', '')
                 
-                # Ajouter des variantes sans tirets/accents
-                name_simple = name_normalized.replace('-', ' ').replace("'", " ")
-                if name_simple != name_normalized:
-                    ALLOCINE_DEPT_MAPPING[name_simple] = dept_id
-        
-        ALLOCINE_DEPT_MAPPING_LOADED = True
-        print(f"   ✅ {len(depts)} départements Allociné chargés")
-        
-        # Afficher quelques exemples pour debug
-        examples = list(ALLOCINE_DEPT_MAPPING.items())[:5]
-        for name, dept_id in examples:
-            print(f"      '{name}' → {dept_id}")
-        
-    except Exception as e:
-        print(f"   ❌ Erreur chargement départements Allociné: {e}")
-        import traceback
-        traceback.print_exc()
+                if name and dept_id:
+                    # Normaliser le nom (minuscules, sans accents problématiques)
+                    name_normalized = name.lower().strip()
+                    mapping[name_normalized] = dept_id
+                    
+                    # Ajouter des variantes sans tirets/accents
+                    name_simple = name_normalized.replace('-', ' ').replace("'", " ")
+                    if name_simple != name_normalized:
+                        mapping[name_simple] = dept_id
+            
+            # Publication en une fois : les autres threads ne voient jamais un mapping partiel
+            ALLOCINE_DEPT_MAPPING = mapping
+            ALLOCINE_DEPT_MAPPING_LOADED = True
+            print(f"   ✅ {len(depts)} départements Allociné chargés")
+            
+            # Afficher quelques exemples pour debug
+            examples = list(ALLOCINE_DEPT_MAPPING.items())[:5]
+            for name, dept_id in examples:
+                print(f"      '{name}' → {dept_id}")
+            
+        except Exception as e:
+            print(f"   ❌ Erreur chargement départements Allociné: {e}")
+            import traceback
+            traceback.print_exc()
+
+
+def start_loading_allocine_departments():
+    """Lance load_allocine_departments dans un thread de fond, sauf s'il tourne déjà."""
+    global ALLOCINE_DEPT_THREAD
+    with ALLOCINE_DEPT_THREAD_LOCK:
+        if ALLOCINE_DEPT_MAPPING_LOADED:
+            return None
+        if ALLOCINE_DEPT_THREAD is None or not ALLOCINE_DEPT_THREAD.is_alive():
+            ALLOCINE_DEPT_THREAD = threading.Thread(target=load_allocine_departments,
+                                                    name="allocine-depts", daemon=True)
+            ALLOCINE_DEPT_THREAD.start()
+        return ALLOCINE_DEPT_THREAD
 
 
 def get_allocine_dept_id_dynamic(dept_name):
     """
     Récupère l'ID Allociné pour un nom de département.
-    Utilise le mapping dynamique chargé au démarrage.
+    Le mapping dynamique est chargé au premier appel : on attend ce chargement
+    au plus ALLOCINE_DEPTS_TIMEOUT secondes (None sinon).
     """
     if not ALLOCINE_DEPT_MAPPING:
-        load_allocine_departments()
+        thread = start_loading_allocine_departments()
+        if thread is not None:
+            thread.join(ALLOCINE_DEPTS_TIMEOUT)
     
     if not dept_name:
         return None
@@ -126,10 +207,11 @@ def get_allocine_dept_id_dynamic(dept_name):
     if name_simple in ALLOCINE_DEPT_MAPPING:
         return ALLOCINE_DEPT_MAPPING[name_simple]
     
-    # Recherche partielle (le nom contient ou est contenu)
-    for key, value in ALLOCINE_DEPT_MAPPING.items():
-        if key in name_normalized or name_normalized in key:
-            return value
+    # Recherche partielle (le nom contient ou est contenu, tolère les fautes de frappe)
+    match = process.extractOne(name_normalized, ALLOCINE_DEPT_MAPPING.keys(),
+                               scorer=fuzz.partial_ratio, score_cutoff=90)
+    if match:
+        return ALLOCINE_DEPT_MAPPING[match[0]]
     
     return None
 
@@ -138,7 +220,39 @@ def get_allocine_dept_id_dynamic(dept_name):
 # CONFIGURATION
 # ============================================================================
 
+# Traces de debug par cinéma / par événement : LOG_LEVEL=DEBUG pour les afficher
+logging.basicConfig(level=os.environ.get("LOG_LEVEL", "INFO").upper(), format="%(message)s")
+logger = logging.getLogger(__name__)
+
+# Scalaires et tableaux NumPy (distances vectorisées) sérialisés directement en C
+ORJSON_OPTIONS = orjson.OPT_SERIALIZE_NUMPY
+
+
+def orjson_default(obj):
+    """Types non gérés nativement par orjson (même rendu que le provider Flask)."""
+    if isinstance(obj, Decimal):
+        return str(obj)
+    raise TypeError
+
+
+class OrjsonProvider(JSONProvider):
+    """Sérialisation JSON via orjson (C) pour jsonify() et les réponses API."""
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, default=orjson_default, option=ORJSON_OPTIONS).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(
+            orjson.dumps(obj, default=orjson_default, option=ORJSON_OPTIONS), mimetype='application/json'
+        )
+
+
 app = Flask(__name__, static_folder='.', static_url_path='')
+app.json = OrjsonProvider(app)
 CORS(app)
 
 # PostgreSQL
@@ -170,17 +284,100 @@ else:
 API_KEY = os.environ.get("OPENAGENDA_API_KEY", "")
 BASE_URL = os.environ.get("OPENAGENDA_BASE_URL", "https://api.openagenda.com/v2")
 
+# Sessions HTTP partagées : keep-alive (pas de nouveau handshake TLS par appel) + retries
+class CappedRetry(Retry):
+    """Retry qui respecte Retry-After, mais sans jamais attendre plus de MAX_RETRY_AFTER secondes."""
+    MAX_RETRY_AFTER = 2.0
+
+    def get_retry_after(self, response):
+        retry_after = super().get_retry_after(response)
+        return None if retry_after is None else min(retry_after, self.MAX_RETRY_AFTER)
+
+
+def create_http_session(headers=None, retry=None):
+    """Crée une session requests avec pool de connexions et retries (502/503/504 par défaut)."""
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=32, pool_maxsize=64,
+        max_retries=retry or Retry(total=2, backoff_factor=0.3, status_forcelist=[502, 503, 504])
+    )
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    if headers:
+        session.headers.update(headers)
+    return session
+
+
+HTTP_SESSION = create_http_session()
+# Nominatim : un seul retry court (429 compris) ; une erreur de transport n'est jamais
+# mise en cache par l'appelant, seule une réponse sans résultat l'est
+NOMINATIM_SESSION = create_http_session(
+    {"User-Agent": "gedeon-events-api/1.0"},
+    retry=CappedRetry(total=1, backoff_factor=0.5, status_forcelist=[429, 500, 502, 503, 504],
+                      respect_retry_after_header=True)
+)
+NOMINATIM_TIMEOUT = (1.5, 2.5)  # (connexion, lecture) en secondes
+
 # Valeurs par défaut
 RADIUS_KM_DEFAULT = 30
 DAYS_AHEAD_DEFAULT = 30
 
+# Redis si REDIS_URL est défini : caches partagés entre workers gunicorn
+REDIS_URL = os.environ.get("REDIS_URL", "")
+SHARED_REDIS = redis.Redis.from_url(REDIS_URL) if REDIS_AVAILABLE and REDIS_URL else None
+
+# Cache des réponses /api/events/nearby (clé : centre arrondi à 0.01° ≈ 1 km)
+# Redis si disponible, sinon mémoire du worker
+NEARBY_CACHE_TTL = 90
+NEARBY_CACHE = TTLCache(maxsize=1024, ttl=NEARBY_CACHE_TTL)
+NEARBY_CACHE_LOCK = threading.Lock()
+
+# Bornes de recherche (au-delà, la bbox couvre toute la table)
+MAX_ABS_LAT = 89
+MAX_RADIUS_KM = 5000
+
 # Caches
-GEOCODE_CACHE = {}
+# Géocodages Nominatim (positifs et négatifs) : borné en taille, expire après 24h
+GEOCODE_CACHE_TTL = 24 * 3600
+GEOCODE_CACHE = TTLCache(maxsize=10000, ttl=GEOCODE_CACHE_TTL)
+GEOCODE_CACHE_LOCK = threading.Lock()  # TTLCache n'est pas thread-safe
+# Caches partagés des géocodages d'adresses (Redis, puis disque), même politique pour
+# les deux : adresse trouvée gardée 30 jours, adresse inconnue de Nominatim 24h.
+# Les erreurs passagères ne sont jamais écrites (voir geocode_address_nominatim)
+GEOCODE_FOUND_TTL = 30 * 24 * 3600
+GEOCODE_MISS_TTL = GEOCODE_CACHE_TTL
+# Copie sur disque (diskcache/SQLite) : survit aux redémarrages, partagée par les workers
+# de la machine
+GEOCODE_DISK_DIR = os.environ.get("GEOCODE_CACHE_DIR", "/tmp/gedeon_geocode")
+GEOCODE_DISK = diskcache.Cache(GEOCODE_DISK_DIR, size_limit=100 * 1024 * 1024) if DISKCACHE_AVAILABLE else None
+# Politique Nominatim : 1 requête/s au maximum, 2 géocodages en vol au plus pour les
+# requêtes (NOMINATIM_EXECUTOR), plus 1 en arrière-plan (GEOCODE_BACKGROUND_EXECUTOR)
+NOMINATIM_MIN_INTERVAL = 1.0
+NOMINATIM_MAX_WORKERS = 2
+# Partagé par toutes les requêtes du worker : la borne de 2 vaut pour le processus entier
+NOMINATIM_EXECUTOR = ThreadPoolExecutor(max_workers=NOMINATIM_MAX_WORKERS, thread_name_prefix="nominatim")
+NOMINATIM_THROTTLE = {'last_call': 0.0}
+NOMINATIM_THROTTLE_LOCK = threading.Lock()
+# À 1 req/s, géocoder toutes les nouvelles adresses d'une requête /api/events/nearby
+# prendrait N secondes : au-delà de ce budget, les adresses restantes sont géocodées
+# en arrière-plan (un seul thread) et apparaissent dans les réponses suivantes
+GEOCODE_REQUEST_BUDGET = 8.0  # secondes, depuis le début de fetch_openagenda_events
+GEOCODE_BACKGROUND_EXECUTOR = ThreadPoolExecutor(max_workers=1, thread_name_prefix="geocode")
+GEOCODE_PENDING = set()  # clés en attente de géocodage en arrière-plan
+GEOCODE_PENDING_MAX = 2000
+GEOCODE_PENDING_LOCK = threading.Lock()
 CINEMA_COORDS_CACHE = {}
 CINEMA_CACHE_FILE = "/tmp/allocine_cinemas_coords.pkl"
-CINEMAS_BY_DEPT_CACHE = {}
-CINEMAS_CACHE_TIMESTAMPS = {}
 CINEMAS_CACHE_DURATION = 3600 * 6  # 6 heures
+# Réponses Allociné get_cinema(dept_id) et get_departements(), partagées par les threads
+CINEMAS_BY_DEPT_CACHE = TTLCache(maxsize=128, ttl=CINEMAS_CACHE_DURATION)
+ALLOCINE_DEPTS_CACHE = TTLCache(maxsize=1, ttl=3600)
+ALLOCINE_CACHE_LOCK = threading.Lock()
+# API Allociné non officielle et sensible au débit : un appel get_showtime/get_movies
+# toutes les 0.15s au plus, tous threads confondus (l'espacement d'origine)
+ALLOCINE_MIN_INTERVAL = 0.15
+ALLOCINE_THROTTLE = {'last_call': 0.0}
+ALLOCINE_THROTTLE_LOCK = threading.Lock()
 
 # Bounding boxes approximatives des départements français (lat_min, lat_max, lon_min, lon_max)
 # Utilisé pour vérifier la cohérence des résultats Nominatim
@@ -316,6 +513,7 @@ def is_coords_in_dept(lat, lon, dept_code):
 
 CINEMAS_CNC_DATA = []  # Liste des cinémas avec coordonnées GPS
 CINEMAS_CNC_LOADED = False
+CINEMAS_CNC_LOCK = threading.Lock()
 
 def load_cinemas_cnc():
     """
@@ -327,19 +525,22 @@ def load_cinemas_cnc():
     if CINEMAS_CNC_LOADED:
         return
     
-    import json
-    cnc_file = os.path.join(os.path.dirname(__file__), 'cinemas_france_data.json')
-    
-    if os.path.exists(cnc_file):
-        try:
-            with open(cnc_file, 'r', encoding='utf-8') as f:
-                CINEMAS_CNC_DATA = json.load(f)
-            CINEMAS_CNC_LOADED = True
-            print(f"   ✅ Base CNC chargée: {len(CINEMAS_CNC_DATA)} cinémas avec GPS")
-        except Exception as e:
-            print(f"   ⚠️ Erreur chargement base CNC: {e}")
-    else:
-        print(f"   ⚠️ Fichier CNC non trouvé: {cnc_file}")
+    with CINEMAS_CNC_LOCK:
+        if CINEMAS_CNC_LOADED:
+            return
+        
+        cnc_file = os.path.join(os.path.dirname(__file__), 'cinemas_france_data.json')
+        
+        if os.path.exists(cnc_file):
+            try:
+                with open(cnc_file, 'rb') as f:
+                    CINEMAS_CNC_DATA = orjson.loads(f.read())
+                CINEMAS_CNC_LOADED = True
+                print(f"   ✅ Base CNC chargée: {len(CINEMAS_CNC_DATA)} cinémas avec GPS")
+            except Exception as e:
+                print(f"   ⚠️ Erreur chargement base CNC: {e}")
+        else:
+            print(f"   ⚠️ Fichier CNC non trouvé: {cnc_file}")
 
 
 def find_cinema_gps_cnc(cinema_name, cinema_address=None, dept_code=None):
@@ -437,8 +638,26 @@ def find_cinema_gps_cnc(cinema_name, cinema_address=None, dept_code=None):
 OPENAGENDA_MAX_WORKERS = 10
 OPENAGENDA_AGENDAS_LIMIT = 30
 OPENAGENDA_EVENTS_PER_AGENDA = 30
-OPENAGENDA_CACHE_FILE = "/tmp/openagenda_agendas_cache.pkl"
+# Endpoint transverse /events (un appel paginé au lieu d'un par agenda), activable par env
+OPENAGENDA_GLOBAL_EVENTS = os.environ.get("OPENAGENDA_GLOBAL_EVENTS", "0") == "1"
+OPENAGENDA_GLOBAL_MAX_PAGES = 10
+OPENAGENDA_CACHE_FILE = "/tmp/openagenda_agendas_cache.pkl.gz"
 OPENAGENDA_CACHE_DURATION = timedelta(hours=24)
+# Copie en mémoire du cache fichier : un seul tuple (timestamp, agendas), remplacé d'un bloc
+# pour que la lecture sans verrou ne voie jamais l'un sans l'autre
+OPENAGENDA_AGENDAS_MEMO = {'entry': None}
+OPENAGENDA_AGENDAS_LOCK = threading.Lock()
+# Réponses brutes par agenda, 5 min, clé (uid, centre arrondi à 0.01°, rayon, jours)
+OPENAGENDA_EVENTS_CACHE = TTLCache(maxsize=2048, ttl=300)
+OPENAGENDA_EVENTS_LOCK = threading.Lock()
+# Ingestion périodique dans la table openagenda_events (migration 003), activable par env :
+# /api/events/nearby lit alors la table au lieu d'interroger OpenAgenda à chaque requête.
+# La table est alimentée par un processus à part : python ingest_openagenda.py
+OPENAGENDA_INGEST = os.environ.get("OPENAGENDA_INGEST", "0") == "1"
+OPENAGENDA_INGEST_INTERVAL = 3600  # secondes
+OPENAGENDA_INGEST_DAYS = 90
+OPENAGENDA_INGEST_MAX_PAGES = 10
+OPENAGENDA_INGEST_LOCK_ID = 7361  # verrou consultatif PostgreSQL : une seule écriture à la fois
 
 # Coordonnées connues de cinémas
 KNOWN_CINEMAS_GPS = {
@@ -458,14 +677,80 @@ KNOWN_CINEMAS_GPS = {
     'gaumont wilson': (43.6070, 1.4480),
 }
 
+# Index des cinémas connus : préfixe de 10 caractères → nom, et une regex
+# unique pour la recherche par inclusion (un seul passage en C par nom)
+KNOWN_CINEMAS_PREFIX = {}
+for _known_name in KNOWN_CINEMAS_GPS:
+    KNOWN_CINEMAS_PREFIX.setdefault(_known_name[:10], _known_name)
+KNOWN_CINEMAS_RE = re.compile("|".join(map(re.escape, KNOWN_CINEMAS_GPS)))
+
+
+def find_known_cinema_gps(name_lower):
+    """Coordonnées d'un cinéma connu (nom contenu ou même préfixe), sinon None."""
+    known_name = KNOWN_CINEMAS_PREFIX.get(name_lower[:10])
+    if known_name is None:
+        match = KNOWN_CINEMAS_RE.search(name_lower)
+        if match is None:
+            return None
+        known_name = match.group(0)
+    return KNOWN_CINEMAS_GPS[known_name]
+
 
 # ============================================================================
 # FONCTIONS UTILITAIRES
 # ============================================================================
 
-def get_db_connection():
-    """Crée une connexion à PostgreSQL."""
-    return psycopg2.connect(**DB_CONFIG, cursor_factory=RealDictCursor)
+# Connexions par worker gunicorn : PG_POOL_MAX x WEB_CONCURRENCY doit rester
+# sous max_connections de PostgreSQL. Un worker gevent sert jusqu'à
+# worker_connections (200) requêtes à la fois : au-delà de PG_POOL_MAX, pg_conn
+# attend qu'une connexion se libère (PG_POOL_WAIT_TIMEOUT au plus) au lieu
+# d'échouer aussitôt sur « connection pool exhausted »
+PG_POOL_MIN = int(os.environ.get("PG_POOL_MIN", 2))
+PG_POOL_MAX = int(os.environ.get("PG_POOL_MAX", 20))
+PG_POOL_WAIT_TIMEOUT = 10  # secondes
+
+DB_POOL = None
+DB_POOL_LOCK = threading.Lock()
+DB_POOL_SLOTS = threading.BoundedSemaphore(PG_POOL_MAX)  # une place par connexion du pool
+
+
+def get_db_pool():
+    """Pool de connexions PostgreSQL partagé par les threads (créé au premier appel)."""
+    global DB_POOL
+    if DB_POOL is None:
+        with DB_POOL_LOCK:
+            if DB_POOL is None:
+                DB_POOL = ThreadedConnectionPool(PG_POOL_MIN, PG_POOL_MAX, **DB_CONFIG, cursor_factory=RealDictCursor)
+    return DB_POOL
+
+
+@contextlib.contextmanager
+def pg_conn():
+    """
+    Emprunte une connexion au pool et la rend à la sortie du bloc.
+    Attend qu'une connexion se libère si le pool est plein (PoolError après PG_POOL_WAIT_TIMEOUT).
+    """
+    db_pool = get_db_pool()
+    if not DB_POOL_SLOTS.acquire(timeout=PG_POOL_WAIT_TIMEOUT):
+        raise PoolError(f"pool PostgreSQL saturé ({PG_POOL_MAX} connexions) depuis {PG_POOL_WAIT_TIMEOUT}s")
+    try:
+        conn = db_pool.getconn()
+        if conn.closed:
+            # Connexion fermée côté serveur pendant qu'elle dormait dans le pool
+            db_pool.putconn(conn, close=True)
+            conn = db_pool.getconn()
+        broken = False
+        try:
+            yield conn
+            conn.commit()
+        except (psycopg2.OperationalError, psycopg2.InterfaceError):
+            broken = True
+            raise
+        finally:
+            # Une connexion cassée est fermée au lieu d'être rendue au pool
+            db_pool.putconn(conn, close=broken or bool(conn.closed))
+    finally:
+        DB_POOL_SLOTS.release()
 
 
 def haversine_km(lat1, lon1, lat2, lon2):
@@ -478,19 +763,53 @@ def haversine_km(lat1, lon1, lat2, lon2):
     return R * 2 * math.atan2(math.sqrt(a), math.sqrt(1-a))
 
 
+def haversine_km_array(lat, lon, lats, lons):
+    """Distances en km entre un point GPS et des tableaux NumPy de points (vectorisé)."""
+    R = 6371.0
+    phi1 = math.radians(lat)
+    phi2 = np.radians(lats)
+    dphi = phi2 - phi1
+    dlambda = np.radians(lons - lon)
+    a = np.sin(dphi/2)**2 + math.cos(phi1) * np.cos(phi2) * np.sin(dlambda/2)**2
+    return R * 2 * np.arctan2(np.sqrt(a), np.sqrt(1-a))
+
+
+DEG_PER_KM = 180.0 / (math.pi * 6371.0)  # degrés de latitude par km (sphère R = 6371 km)
+
+
 def calculate_bounding_box(lat, lng, radius_km):
     """Calcule la bounding box pour une recherche géographique."""
-    EARTH_RADIUS_KM = 6371.0
-    radius_rad = radius_km / EARTH_RADIUS_KM
-    lat_rad = math.radians(lat)
-    lat_delta = math.degrees(radius_rad)
-    lng_delta = math.degrees(radius_rad / math.cos(lat_rad))
+    lat_delta = radius_km * DEG_PER_KM
+    # cos(lat) → 0 près des pôles : borner pour éviter une bbox démesurée
+    cos_lat = max(math.cos(math.radians(lat)), 1e-6)
+    lng_delta = min(lat_delta / cos_lat, 180.0)
     return {
-        'northEast': {'lat': lat + lat_delta, 'lng': lng + lng_delta},
-        'southWest': {'lat': lat - lat_delta, 'lng': lng - lng_delta}
+        'northEast': {'lat': min(90.0, lat + lat_delta), 'lng': lng + lng_delta},
+        'southWest': {'lat': max(-90.0, lat - lat_delta), 'lng': lng - lng_delta}
     }
 
 
+class NominatimBudgetExceeded(Exception):
+    """Pas de créneau Nominatim libre avant l'échéance de la requête."""
+
+
+def wait_nominatim_slot(deadline=None):
+    """
+    Réserve puis attend le prochain créneau Nominatim (1 requête/s max, tous threads
+    confondus). Retourne False sans rien réserver si ce créneau tombe après
+    `deadline` (time.monotonic()).
+    """
+    with NOMINATIM_THROTTLE_LOCK:
+        slot = max(time.monotonic(), NOMINATIM_THROTTLE['last_call'] + NOMINATIM_MIN_INTERVAL)
+        if deadline is not None and slot > deadline:
+            return False
+        NOMINATIM_THROTTLE['last_call'] = slot
+    wait = slot - time.monotonic()
+    if wait > 0:
+        time.sleep(wait)
+    return True
+
+
 def reverse_geocode_nominatim(lat, lon):
     """
     Récupère les infos de localisation via Nominatim.
@@ -498,20 +817,20 @@ def reverse_geocode_nominatim(lat, lon):
     """
     # Cache avec précision à 3 décimales (~100m) au lieu de 2 (~1km)
     cache_key = (round(lat, 3), round(lon, 3))
-    if cache_key in GEOCODE_CACHE:
-        cached = GEOCODE_CACHE[cache_key]
-        # Vérifier que c'est bien un tuple de 3 éléments (pas un ancien format)
-        if isinstance(cached, tuple) and len(cached) == 3:
-            return cached
+    with GEOCODE_CACHE_LOCK:
+        cached = GEOCODE_CACHE.get(cache_key)
+    # Vérifier que c'est bien un tuple de 3 éléments (pas un ancien format)
+    if isinstance(cached, tuple) and len(cached) == 3:
+        return cached
     
+    wait_nominatim_slot()
     url = "https://nominatim.openstreetmap.org/reverse"
     params = {"lat": lat, "lon": lon, "format": "json", "zoom": 10, "addressdetails": 1}
-    headers = {"User-Agent": "gedeon-events-api/1.0"}
     
     try:
-        r = requests.get(url, params=params, headers=headers, timeout=10)
+        r = NOMINATIM_SESSION.get(url, params=params, timeout=NOMINATIM_TIMEOUT)
         r.raise_for_status()
-        data = r.json()
+        data = orjson.loads(r.content)
         address = data.get("address", {})
         
         postcode = address.get("postcode", "")
@@ -527,43 +846,180 @@ def reverse_geocode_nominatim(lat, lon):
             dept_name = state
         
         result = (dept_name, postcode, city)
-        GEOCODE_CACHE[cache_key] = result
+        with GEOCODE_CACHE_LOCK:
+            GEOCODE_CACHE[cache_key] = result
         return result
         
     except Exception as e:
+        # Panne passagère ou réponse illisible : pas de cache, retentée au prochain appel
         print(f"   ⚠️ Erreur Nominatim reverse: {e}")
-        GEOCODE_CACHE[cache_key] = (None, None, None)
         return (None, None, None)
 
 
-def geocode_address_nominatim(address_str):
-    """Géocode une adresse texte avec respect du rate limit Nominatim."""
+def geocode_cache_key(address_str):
+    """Clé de cache d'une adresse : casse et espaces normalisés."""
+    return " ".join(address_str.lower().split())
+
+
+def shared_geocode_get(address_str):
+    """Géocodage (lat, lon) partagé (Redis, puis disque), ou None si absent."""
+    key = f"geocode:{address_str}"
+    if SHARED_REDIS is not None:
+        try:
+            cached = SHARED_REDIS.get(key)
+            if cached:
+                return tuple(orjson.loads(cached))
+        except Exception as e:
+            print(f"   ⚠️ Erreur Redis: {e}")
+    if GEOCODE_DISK is not None:
+        try:
+            return GEOCODE_DISK.get(key)
+        except Exception as e:
+            print(f"   ⚠️ Erreur cache disque: {e}")
+    return None
+
+
+def shared_geocode_set(address_str, coords):
+    """Partage un géocodage (lat, lon) avec les autres workers et les prochains démarrages."""
+    key = f"geocode:{address_str}"
+    ttl = GEOCODE_FOUND_TTL if coords[0] is not None else GEOCODE_MISS_TTL
+    if SHARED_REDIS is not None:
+        try:
+            SHARED_REDIS.setex(key, ttl, orjson.dumps(coords))
+        except Exception as e:
+            print(f"   ⚠️ Erreur Redis: {e}")
+    if GEOCODE_DISK is not None:
+        try:
+            GEOCODE_DISK.set(key, coords, expire=ttl)
+        except Exception as e:
+            print(f"   ⚠️ Erreur cache disque: {e}")
+
+
+def nominatim_search(params, deadline=None):
+    """
+    Une recherche Nominatim (1 req/s) : (lat, lon) du premier résultat, ou None
+    si Nominatim a répondu sans résultat. Les erreurs de transport (timeout, 429,
+    5xx) et les réponses illisibles lèvent une exception : elles ne disent rien
+    de l'adresse et ne doivent pas être mises en cache.
+    NominatimBudgetExceeded si aucun créneau n'est libre avant `deadline`.
+    """
+    if not wait_nominatim_slot(deadline):
+        raise NominatimBudgetExceeded()
+    url = "https://nominatim.openstreetmap.org/search"
+    r = NOMINATIM_SESSION.get(url, params={**params, "format": "json", "limit": 1},
+                              timeout=NOMINATIM_TIMEOUT)
+    r.raise_for_status()
+    data = orjson.loads(r.content)
+    if data:
+        return float(data[0]["lat"]), float(data[0]["lon"])
+    return None
+
+
+# Code postal et tout ce qui le suit dans une adresse OpenAgenda ("12 rue X 31000 Toulouse")
+ADDRESS_POSTCODE_RE = re.compile(r"\s*\b(\d{5})\b.*$")
+
+
+def street_of(address, city):
+    """
+    Rue d'une adresse OpenAgenda, sans code postal ni ville, et le code postal trouvé.
+    "12 rue X, 31000 Ville" comme "12 rue X 31000 Ville" → ("12 rue X", "31000").
+    """
+    street = address.split(",")[0].strip()
+    postcode = None
+    m = ADDRESS_POSTCODE_RE.search(street)
+    if m:
+        postcode = m.group(1)
+        street = street[:m.start()]
+    elif city and street.lower().endswith(city.lower()):
+        street = street[:-len(city)]
+    return street.strip(" ,-"), postcode
+
+
+def location_query(loc):
+    """
+    Requêtes Nominatim d'un lieu OpenAgenda : (adresse texte, paramètres structurés ou None).
+    L'adresse texte sert de clé de cache et de requête q= de repli.
+    """
+    parts = [loc.get("name"), loc.get("address"), loc.get("city"), "France"]
+    address_str = ", ".join([p for p in parts if p])
+    
+    structured = None
+    if loc.get("city"):
+        structured = {"city": loc["city"], "country": "France"}
+        postcode = loc.get("postalCode")
+        if loc.get("address"):
+            # La ville (et le code postal) sont des champs à part : les laisser dans
+            # street= ferait échouer la recherche structurée
+            street, address_postcode = street_of(loc["address"], loc["city"])
+            if street:
+                structured["street"] = street
+            postcode = postcode or address_postcode
+        if postcode:
+            structured["postalcode"] = postcode
+    return address_str, structured
+
+
+def schedule_background_geocode(address_str, structured=None):
+    """Géocode l'adresse plus tard, hors requête (une seule fois même si demandée souvent)."""
+    key = geocode_cache_key(address_str)
+    with GEOCODE_PENDING_LOCK:
+        if key in GEOCODE_PENDING or len(GEOCODE_PENDING) >= GEOCODE_PENDING_MAX:
+            return
+        GEOCODE_PENDING.add(key)
+    
+    def run():
+        try:
+            geocode_address_nominatim(address_str, structured)
+        finally:
+            with GEOCODE_PENDING_LOCK:
+                GEOCODE_PENDING.discard(key)
+    
+    GEOCODE_BACKGROUND_EXECUTOR.submit(run)
+
+
+def geocode_address_nominatim(address_str, structured=None, deadline=None):
+    """
+    Géocode une adresse avec respect du rate limit Nominatim.
+    Avec `structured` (street/city/postalcode/country), la recherche structurée,
+    plus rapide côté Nominatim, est tentée d'abord. q=address_str ne sert de repli
+    que si la requête structurée était partielle (sans rue) : un lieu introuvable
+    coûte ainsi un seul créneau Nominatim, pas deux.
+    Avec `deadline`, une adresse sans créneau libre à temps est renvoyée en
+    arrière-plan (schedule_background_geocode) et (None, None) est retourné.
+    """
     if not address_str:
         return None, None
     
-    if address_str in GEOCODE_CACHE:
-        cached = GEOCODE_CACHE[address_str]
-        if isinstance(cached, tuple) and len(cached) == 2:
-            return cached
+    cache_key = geocode_cache_key(address_str)
+    with GEOCODE_CACHE_LOCK:
+        cached = GEOCODE_CACHE.get(cache_key)
+    if isinstance(cached, tuple) and len(cached) == 2:
+        return cached
     
-    url = "https://nominatim.openstreetmap.org/search"
-    params = {"q": address_str, "format": "json", "limit": 1}
-    headers = {"User-Agent": "gedeon-events-api/1.0"}
+    # Déjà géocodée par un autre worker ou avant le redémarrage ?
+    shared = shared_geocode_get(cache_key)
+    if shared is not None:
+        with GEOCODE_CACHE_LOCK:
+            GEOCODE_CACHE[cache_key] = shared
+        return shared
     
     try:
-        r = requests.get(url, params=params, headers=headers, timeout=10)
-        r.raise_for_status()
-        data = r.json()
-        if data:
-            lat, lon = float(data[0]["lat"]), float(data[0]["lon"])
-            GEOCODE_CACHE[address_str] = (lat, lon)
-            time.sleep(0.05)  # 50ms entre requêtes (respect rate limit Nominatim)
-            return lat, lon
-    except Exception:
-        pass
+        coords = nominatim_search(structured, deadline) if structured else None
+        if coords is None and (structured is None or "street" not in structured):
+            coords = nominatim_search({"q": address_str}, deadline)
+    except NominatimBudgetExceeded:
+        schedule_background_geocode(address_str, structured)
+        return None, None
+    except (requests.RequestException, KeyError, ValueError) as e:
+        # Panne passagère : pas de cache, l'adresse sera retentée au prochain appel
+        print(f"   ⚠️ Erreur Nominatim pour '{address_str}': {e}")
+        return None, None
+    result = coords or (None, None)
     
-    GEOCODE_CACHE[address_str] = (None, None)
-    return None, None
+    with GEOCODE_CACHE_LOCK:
+        GEOCODE_CACHE[cache_key] = result
+    shared_geocode_set(cache_key, result)
+    return result
 
 
 def load_cinema_coords_cache():
@@ -591,70 +1047,73 @@ def save_cinema_coords_cache():
 # DATATOURISME
 # ============================================================================
 
+# Colonnes de la requête DATAtourisme, dans l'ordre du SELECT (= clés du JSON)
+DATATOURISME_EVENT_COLS = (
+    'uid', 'title', 'description', 'begin', 'end', 'latitude', 'longitude',
+    'address', 'city', 'postalCode', 'contacts', 'distanceKm',
+    'locationName', 'source', 'agendaTitle', 'openagendaUrl',
+)
+
+
 def fetch_datatourisme_events(center_lat, center_lon, radius_km, days_ahead):
     """Récupère les événements DATAtourisme (requête SQL optimisée)."""
     try:
         start_time = time.time()
-        conn = get_db_connection()
-        cur = conn.cursor()
-        
-        date_limite = datetime.now().date() + timedelta(days=days_ahead)
-        
-        query = """
-            WITH nearby_events AS (
-                SELECT uri, nom, description, date_debut, date_fin,
-                       latitude, longitude, adresse, commune, code_postal, contacts, geom
-                FROM evenements
-                WHERE (date_fin IS NULL OR date_fin >= CURRENT_DATE)
-                  AND (date_debut IS NULL OR date_debut <= %s)
-                  AND ST_DWithin(geom::geography, ST_SetSRID(ST_MakePoint(%s, %s), 4326)::geography, %s)
-                LIMIT 500
-            )
-            SELECT uri as uid, nom as title, description,
-                   date_debut as begin, date_fin as end,
-                   latitude, longitude, adresse as address, commune as city,
-                   code_postal as "postalCode", contacts,
-                   ST_Distance(geom::geography, ST_SetSRID(ST_MakePoint(%s, %s), 4326)::geography) / 1000 as "distanceKm"
-            FROM nearby_events
-            ORDER BY "distanceKm", date_debut
-        """
-        
-        cur.execute(query, (date_limite, center_lon, center_lat, radius_km * 1000, center_lon, center_lat))
-        rows = cur.fetchall()
-        
-        events = []
-        for row in rows:
-            event = dict(row)
-            if event.get('begin'):
-                event['begin'] = event['begin'].isoformat()
-            if event.get('end'):
-                event['end'] = event['end'].isoformat()
-            if event.get('distanceKm'):
-                event['distanceKm'] = round(event['distanceKm'], 1)
+        with pg_conn() as conn:
+            # Curseur nommé (côté serveur) : les lignes arrivent par lots de itersize.
+            # Lignes en tuples (pas de RealDictCursor), zippées avec DATATOURISME_EVENT_COLS
+            cur = conn.cursor(name='nearby_evts', cursor_factory=psycopg2.extensions.cursor)
+            cur.itersize = 256
             
-            event['locationName'] = event.get('city', '')
-            event['source'] = 'DATAtourisme'
-            event['agendaTitle'] = 'DATAtourisme'
+            date_limite = datetime.now().date() + timedelta(days=days_ahead)
             
-            contacts = event.get('contacts', '')
-            event['openagendaUrl'] = ''
-            if contacts and '#' in contacts:
-                for part in contacts.split('#'):
-                    if part.startswith('http'):
-                        event['openagendaUrl'] = part
-                        break
+            # Calculs sur la sphère (use_spheroid = false) : plus rapides que l'ellipsoïde,
+            # et cohérents avec haversine_km utilisé pour OpenAgenda.
+            # Les 500 événements les plus proches (parcours KNN de l'index GIST sur geog),
+            # et non 500 événements quelconques du rayon.
+            # PostGIS renvoie des champs prêts pour le JSON : dates ISO 8601 (to_json),
+            # distance arrondie, source et URL extraite des contacts.
+            # Ordre final = clé du tri de get_nearby_events (distance arrondie, puis date,
+            # dates absentes en tête) : la liste y arrive en un seul bloc déjà trié
+            query = """
+                WITH nearby_events AS (
+                    SELECT uri, nom, description, date_debut, date_fin,
+                           latitude, longitude, adresse, commune, code_postal, contacts,
+                           ST_Distance(geog, ST_MakePoint(%s, %s)::geography, false) / 1000 AS dist_km
+                    FROM evenements
+                    WHERE (date_fin IS NULL OR date_fin >= CURRENT_DATE)
+                      AND (date_debut IS NULL OR date_debut <= %s)
+                      AND ST_DWithin(geog, ST_MakePoint(%s, %s)::geography, %s, false)
+                    ORDER BY geog <-> ST_MakePoint(%s, %s)::geography
+                    LIMIT 500
+                )
+                SELECT uri as uid, nom as title, description,
+                       to_json(date_debut) #>> '{}' as begin, to_json(date_fin) #>> '{}' as end,
+                       latitude, longitude, adresse as address, commune as city,
+                       code_postal as "postalCode", contacts,
+                       ROUND(dist_km::numeric, 1)::float8 as "distanceKm",
+                       commune as "locationName",
+                       'DATAtourisme' as source, 'DATAtourisme' as "agendaTitle",
+                       COALESCE(CASE WHEN strpos(contacts, '#') > 0
+                                     THEN (regexp_match(contacts, '(?:^|#)(http[^#]*)'))[1] END, '') as "openagendaUrl"
+                FROM nearby_events
+                ORDER BY "distanceKm", date_debut NULLS FIRST
+            """
+            
+            cur.execute(query, (center_lon, center_lat, date_limite, center_lon, center_lat, radius_km * 1000,
+                                center_lon, center_lat))
+            
+            events = [dict(zip(DATATOURISME_EVENT_COLS, row)) for row in cur]
+            
+            cur.close()
             
-            events.append(event)
-        
-        cur.close()
-        conn.close()
-        
         print(f"   ⚡ DATAtourisme: {len(events)} événements en {time.time()-start_time:.3f}s")
         return events
         
     except Exception as e:
+        # Remontée à fetch_all_events_parallel : la réponse ne sera pas mise en cache
         print(f"   ❌ Erreur DATAtourisme: {e}")
-        return []
+        raise
 
 
 # ============================================================================
@@ -662,136 +1121,334 @@ def fetch_datatourisme_events(center_lat, center_lon, radius_km, days_ahead):
 # ============================================================================
 
 def get_cached_agendas():
-    """Cache la liste des agendas pendant 24h."""
-    if os.path.exists(OPENAGENDA_CACHE_FILE):
+    """Cache la liste des agendas pendant 24h (mémoire, puis fichier, puis API)."""
+    memo = OPENAGENDA_AGENDAS_MEMO
+    entry = memo['entry']
+    if entry is not None and datetime.now() - entry[0] < OPENAGENDA_CACHE_DURATION:
+        return entry[1]
+    
+    # Un seul thread recharge le cache, les autres attendent son résultat
+    with OPENAGENDA_AGENDAS_LOCK:
+        entry = memo['entry']
+        if entry is not None and datetime.now() - entry[0] < OPENAGENDA_CACHE_DURATION:
+            return entry[1]
+        
+        if os.path.exists(OPENAGENDA_CACHE_FILE):
+            try:
+                with gzip.open(OPENAGENDA_CACHE_FILE, 'rb') as f:
+                    cached_data = pickle.load(f)
+                    if datetime.now() - cached_data['timestamp'] < OPENAGENDA_CACHE_DURATION:
+                        memo['entry'] = (cached_data['timestamp'], cached_data['agendas'])
+                        return cached_data['agendas']
+            except Exception:
+                pass
+        
+        if not API_KEY:
+            return []
+        
+        url = f"{BASE_URL}/agendas"
+        params = {"key": API_KEY, "size": 100}
+        
         try:
-            with open(OPENAGENDA_CACHE_FILE, 'rb') as f:
-                cached_data = pickle.load(f)
-                if datetime.now() - cached_data['timestamp'] < OPENAGENDA_CACHE_DURATION:
-                    return cached_data['agendas']
+            r = HTTP_SESSION.get(url, params=params, timeout=15)
+            r.raise_for_status()
+            agendas = orjson.loads(r.content).get('agendas', [])
+            timestamp = datetime.now()
+            
+            with gzip.open(OPENAGENDA_CACHE_FILE, 'wb', compresslevel=3) as f:
+                pickle.dump({'timestamp': timestamp, 'agendas': agendas}, f, protocol=pickle.HIGHEST_PROTOCOL)
+            
+            memo['entry'] = (timestamp, agendas)
+            return agendas
         except Exception:
-            pass
+            return []
+
+
+def get_agenda_events_cached(uid, center_lat, center_lon, radius_km, days_ahead):
+    """
+    Événements bruts d'un agenda OpenAgenda, mis en cache 5 minutes.
+    La bbox est calculée sur le centre arrondi (élargie de 1 km) pour que les
+    utilisateurs voisins partagent la même entrée ; le filtre de distance exact
+    reste fait par l'appelant.
+    """
+    lat_key, lon_key = round(center_lat, 2), round(center_lon, 2)
+    cache_key = (uid, lat_key, lon_key, radius_km, days_ahead)
+    with OPENAGENDA_EVENTS_LOCK:
+        events = OPENAGENDA_EVENTS_CACHE.get(cache_key)
+    if events is not None:
+        return events
     
-    if not API_KEY:
-        return []
+    url = f"{BASE_URL}/agendas/{uid}/events"
+    bbox = calculate_bounding_box(lat_key, lon_key, radius_km + 1)
+    today_str = datetime.now().strftime('%Y-%m-%d')
+    end_date_str = (datetime.now() + timedelta(days=days_ahead)).strftime('%Y-%m-%d')
+    
+    params = {
+        'key': API_KEY, 'size': OPENAGENDA_EVENTS_PER_AGENDA, 'detailed': 1,
+        'geo[northEast][lat]': bbox['northEast']['lat'],
+        'geo[northEast][lng]': bbox['northEast']['lng'],
+        'geo[southWest][lat]': bbox['southWest']['lat'],
+        'geo[southWest][lng]': bbox['southWest']['lng'],
+        'timings[gte]': today_str, 'timings[lte]': end_date_str,
+    }
     
-    url = f"{BASE_URL}/agendas"
-    params = {"key": API_KEY, "size": 100}
+    # Appel HTTP hors verrou : les workers ne se bloquent pas entre eux
+    r = HTTP_SESSION.get(url, params=params, timeout=15)
+    r.raise_for_status()
+    events = orjson.loads(r.content).get('events', [])
     
-    try:
-        r = requests.get(url, params=params, timeout=15)
-        r.raise_for_status()
-        agendas = r.json().get('agendas', [])
-        
-        with open(OPENAGENDA_CACHE_FILE, 'wb') as f:
-            pickle.dump({'timestamp': datetime.now(), 'agendas': agendas}, f)
-        
-        return agendas
-    except Exception:
-        return []
+    with OPENAGENDA_EVENTS_LOCK:
+        OPENAGENDA_EVENTS_CACHE[cache_key] = events
+    return events
 
 
-def process_agenda_events(agenda, center_lat, center_lon, radius_km, days_ahead):
-    """Worker pour traiter un agenda OpenAgenda."""
-    uid = agenda.get('uid')
-    agenda_slug = agenda.get('slug')
+def agenda_title_of(agenda):
+    """Titre lisible d'un agenda OpenAgenda."""
     title = agenda.get('title', {})
-    agenda_title = title.get('fr') or title.get('en') or 'Agenda' if isinstance(title, dict) else (title or 'Agenda')
+    return title.get('fr') or title.get('en') or 'Agenda' if isinstance(title, dict) else (title or 'Agenda')
+
+
+def locate_agenda_events(events, deadline=None):
+    """
+    Coordonnées des événements bruts OpenAgenda : celles de l'API, sinon le
+    géocodage Nominatim de l'adresse. Retourne [(ev, loc, lat, lon)].
+    Avec `deadline`, les adresses non géocodées à temps sont omises de ce résultat.
+    """
+    # 1er passage : adresses des événements sans coordonnées, géocodées en parallèle
+    addresses = {}
+    queries = {}  # adresse texte → paramètres structurés (premier lieu rencontré)
+    for ev in events:
+        loc = ev.get('location') or {}
+        if loc.get('latitude') is None or loc.get('longitude') is None:
+            address_str, structured = location_query(loc)
+            addresses[id(ev)] = address_str
+            queries.setdefault(address_str, structured)
+    
+    geocoded = {}
+    if queries:
+        geocoded = dict(zip(queries, NOMINATIM_EXECUTOR.map(
+            geocode_address_nominatim, queries, queries.values(), [deadline] * len(queries))))
+    
+    # 2e passage : coordonnées de chaque événement
+    located = []
+    for ev in events:
+        loc = ev.get('location') or {}
+        ev_lat, ev_lon = loc.get('latitude'), loc.get('longitude')
+        
+        if ev_lat is None or ev_lon is None:
+            ev_lat, ev_lon = geocoded[addresses[id(ev)]]
+            if ev_lat is None:
+                continue
+        
+        try:
+            located.append((ev, loc, float(ev_lat), float(ev_lon)))
+        except (ValueError, TypeError):
+            continue
     
+    return located
+
+
+def parse_timing_date(date_str):
+    """Date ISO d'un horaire OpenAgenda en datetime avec fuseau (None si absente ou illisible)."""
     try:
-        url = f"{BASE_URL}/agendas/{uid}/events"
-        bbox = calculate_bounding_box(center_lat, center_lon, radius_km)
-        today_str = datetime.now().strftime('%Y-%m-%d')
-        end_date_str = (datetime.now() + timedelta(days=days_ahead)).strftime('%Y-%m-%d')
-        
-        params = {
-            'key': API_KEY, 'size': OPENAGENDA_EVENTS_PER_AGENDA, 'detailed': 1,
-            'geo[northEast][lat]': bbox['northEast']['lat'],
-            'geo[northEast][lng]': bbox['northEast']['lng'],
-            'geo[southWest][lat]': bbox['southWest']['lat'],
-            'geo[southWest][lng]': bbox['southWest']['lng'],
-            'timings[gte]': today_str, 'timings[lte]': end_date_str,
-        }
-        
-        r = requests.get(url, params=params, timeout=15)
+        dt = datetime.fromisoformat(date_str)
+    except (TypeError, ValueError):
+        return None
+    return dt if dt.tzinfo else dt.replace(tzinfo=timezone.utc)
+
+
+def upcoming_timing(timings):
+    """
+    Première séance non terminée d'un événement (la première tout court à défaut) :
+    un événement récurrent dont la première séance est passée reste à venir.
+    """
+    now = datetime.now(timezone.utc)
+    for timing in timings:
+        end = parse_timing_date(timing.get('end'))
+        if end is None or end >= now:
+            return timing
+    return timings[0] if timings else {}
+
+
+def last_timing_end(timings):
+    """Fin de la dernière séance d'un événement (texte ISO d'OpenAgenda)."""
+    ends = [t.get('end') for t in timings if parse_timing_date(t.get('end')) is not None]
+    return max(ends, key=parse_timing_date) if ends else None
+
+
+def format_agenda_event(ev, loc, ev_lat, ev_lon, agenda_slug, agenda_title, distance_km=None):
+    """Événement OpenAgenda au format de l'API, construit en un seul dict."""
+    timing = upcoming_timing(ev.get('timings') or [])
+    begin_str = timing.get('begin')
+    end_str = timing.get('end')
+    
+    title_field = ev.get('title')
+    ev_title = title_field.get('fr') or title_field.get('en') or 'Événement' if isinstance(title_field, dict) else (title_field or 'Événement')
+    
+    event_slug = ev.get('slug')
+    openagenda_url = f"https://openagenda.com/{agenda_slug}/events/{event_slug}?lang=fr" if agenda_slug and event_slug else None
+    
+    return {
+        "uid": f"oa-{ev.get('uid')}",
+        "title": ev_title,
+        "begin": begin_str,
+        "end": end_str,
+        "locationName": loc.get("name"),
+        "city": loc.get("city"),
+        "address": loc.get("address"),
+        "latitude": ev_lat,
+        "longitude": ev_lon,
+        "distanceKm": distance_km,
+        "openagendaUrl": openagenda_url,
+        "agendaTitle": agenda_title,
+        "source": "OpenAgenda"
+    }
+
+
+def build_agenda_events(events, agenda_slug, agenda_title, center_lat, center_lon, radius_km, deadline=None):
+    """Formate les événements bruts d'un agenda et filtre sur le rayon exact."""
+    located = locate_agenda_events(events, deadline)
+    if not located:
+        return []
+    
+    # Distances calculées en une passe vectorisée, puis filtre sur le rayon
+    dists = haversine_km_array(
+        center_lat, center_lon,
+        np.fromiter((item[2] for item in located), dtype=np.float64, count=len(located)),
+        np.fromiter((item[3] for item in located), dtype=np.float64, count=len(located))
+    )
+    
+    agenda_events = []
+    for (ev, loc, ev_lat, ev_lon), dist in zip(located, dists.tolist()):
+        if dist > radius_km:
+            continue
+        agenda_events.append(format_agenda_event(ev, loc, ev_lat, ev_lon, agenda_slug, agenda_title, round(dist, 1)))
+    
+    return agenda_events
+
+
+def process_agenda_events(agenda, center_lat, center_lon, radius_km, days_ahead, deadline=None):
+    """Worker pour traiter un agenda OpenAgenda (les erreurs remontent à l'appelant)."""
+    events = get_agenda_events_cached(agenda.get('uid'), center_lat, center_lon, radius_km, days_ahead)
+    
+    if not events:
+        return []
+    
+    return build_agenda_events(events, agenda.get('slug'), agenda_title_of(agenda),
+                               center_lat, center_lon, radius_km, deadline)
+
+
+def fetch_all_events_bbox(center_lat, center_lon, radius_km, days_ahead, agendas_by_uid, deadline=None):
+    """
+    Un seul appel paginé à l'endpoint transverse /events au lieu d'un appel par agenda.
+    Les événements sont regroupés par agenda d'origine ; seuls ceux des agendas
+    sélectionnés sont conservés.
+    """
+    url = f"{BASE_URL}/events"
+    bbox = calculate_bounding_box(center_lat, center_lon, radius_km)
+    params = {
+        'key': API_KEY, 'size': 100, 'detailed': 1,
+        'geo[northEast][lat]': bbox['northEast']['lat'],
+        'geo[northEast][lng]': bbox['northEast']['lng'],
+        'geo[southWest][lat]': bbox['southWest']['lat'],
+        'geo[southWest][lng]': bbox['southWest']['lng'],
+        'timings[gte]': datetime.now().strftime('%Y-%m-%d'),
+        'timings[lte]': (datetime.now() + timedelta(days=days_ahead)).strftime('%Y-%m-%d'),
+    }
+    
+    events_by_agenda = {}
+    for _ in range(OPENAGENDA_GLOBAL_MAX_PAGES):
+        r = HTTP_SESSION.get(url, params=params, timeout=15)
         r.raise_for_status()
-        events = r.json().get('events', [])
-        
-        if not events:
-            return []
-        
-        agenda_events = []
+        data = orjson.loads(r.content)
+        events = data.get('events') or []
         for ev in events:
-            timings = ev.get('timings') or []
-            begin_str = timings[0].get('begin') if timings else None
-            end_str = timings[0].get('end') if timings else None
-            
-            loc = ev.get('location') or {}
-            ev_lat, ev_lon = loc.get('latitude'), loc.get('longitude')
-            
-            if ev_lat is None or ev_lon is None:
-                parts = [loc.get("name"), loc.get("address"), loc.get("city"), "France"]
-                address_str = ", ".join([p for p in parts if p])
-                ev_lat, ev_lon = geocode_address_nominatim(address_str)
-                if ev_lat is None:
-                    continue
-                time.sleep(0.1)
-            
-            try:
-                ev_lat, ev_lon = float(ev_lat), float(ev_lon)
-            except (ValueError, TypeError):
-                continue
-            
-            dist = haversine_km(center_lat, center_lon, ev_lat, ev_lon)
-            if dist > radius_km:
-                continue
-            
-            title_field = ev.get('title')
-            ev_title = title_field.get('fr') or title_field.get('en') or 'Événement' if isinstance(title_field, dict) else (title_field or 'Événement')
-            
-            event_slug = ev.get('slug')
-            openagenda_url = f"https://openagenda.com/{agenda_slug}/events/{event_slug}?lang=fr" if agenda_slug and event_slug else None
-            
-            agenda_events.append({
-                "uid": f"oa-{ev.get('uid')}",
-                "title": ev_title,
-                "begin": begin_str,
-                "end": end_str,
-                "locationName": loc.get("name"),
-                "city": loc.get("city"),
-                "address": loc.get("address"),
-                "latitude": ev_lat,
-                "longitude": ev_lon,
-                "distanceKm": round(dist, 1),
-                "openagendaUrl": openagenda_url,
-                "agendaTitle": agenda_title,
-                "source": "OpenAgenda"
-            })
+            agenda_uid = (ev.get('originAgenda') or {}).get('uid')
+            if agenda_uid in agendas_by_uid:
+                events_by_agenda.setdefault(agenda_uid, []).append(ev)
         
-        return agenda_events
-        
-    except Exception:
-        return []
+        after = data.get('after')
+        if not events or not after:
+            break
+        params['after[]'] = after
+    
+    all_events = []
+    for agenda_uid, events in events_by_agenda.items():
+        agenda = agendas_by_uid[agenda_uid]
+        all_events.extend(build_agenda_events(events, agenda.get('slug'), agenda_title_of(agenda),
+                                              center_lat, center_lon, radius_km, deadline))
+    return all_events
 
 
-def fetch_openagenda_events(center_lat, center_lon, radius_km, days_ahead):
-    """Récupère les événements OpenAgenda avec parallélisation."""
-    start_time = time.time()
-    
+def event_sort_key(event):
+    """
+    Clé du tri final : distance (absente en dernier, 0.0 en tête), puis date de début
+    (absente en tête). Même ordre que l'ORDER BY de la requête DATAtourisme.
+    """
+    distance = event.get("distanceKm")
+    return (distance if distance is not None else 999, event.get("begin") or "")
+
+
+def dedupe_events(events, key_fields):
+    """Supprime les doublons (même valeur pour key_fields) en conservant l'ordre."""
+    seen = set()
+    unique_events = []
+    for ev in events:
+        key = tuple(ev.get(f) for f in key_fields)
+        if key not in seen:
+            seen.add(key)
+            unique_events.append(ev)
+    return unique_events
+
+
+def select_top_agendas():
+    """Les agendas interrogés : 20 officiels puis 10 autres."""
     agendas = get_cached_agendas()
     if not agendas:
         return []
-    
-    # Sélectionner les meilleurs agendas
     official = [a for a in agendas if a.get('official')]
     others = [a for a in agendas if not a.get('official')]
-    top_agendas = official[:20] + others[:10]
+    return official[:20] + others[:10]
+
+
+def fetch_openagenda_events(center_lat, center_lon, radius_km, days_ahead):
+    """
+    Récupère les événements OpenAgenda avec parallélisation.
+    Retourne (événements, complet) : complet est faux si la liste des agendas ou
+    au moins un agenda n'a pas pu être lu (résultat partiel, à ne pas mettre en cache).
+    """
+    start_time = time.time()
+    # Échéance des géocodages Nominatim faits pendant la requête
+    geocode_deadline = time.monotonic() + GEOCODE_REQUEST_BUDGET
+    
+    if OPENAGENDA_INGEST:
+        try:
+            all_events = fetch_openagenda_events_db(center_lat, center_lon, radius_km, days_ahead)
+            print(f"   ⚡ OpenAgenda (table): {len(all_events)} événements en {time.time()-start_time:.3f}s")
+            return all_events, True
+        except Exception as e:
+            print(f"   ⚠️ Table openagenda_events indisponible ({e}), repli sur l'API")
+    
+    top_agendas = select_top_agendas()
+    if not top_agendas:
+        return [], False
+    
+    if OPENAGENDA_GLOBAL_EVENTS:
+        try:
+            all_events = fetch_all_events_bbox(center_lat, center_lon, radius_km, days_ahead,
+                                               {a.get('uid'): a for a in top_agendas}, geocode_deadline)
+            print(f"   ⚡ OpenAgenda (transverse): {len(all_events)} événements en {time.time()-start_time:.1f}s")
+            return all_events, True
+        except Exception as e:
+            print(f"   ⚠️ OpenAgenda transverse indisponible ({e}), repli par agenda")
     
     all_events = []
+    failed = 0
     
     with ThreadPoolExecutor(max_workers=OPENAGENDA_MAX_WORKERS) as executor:
         futures = {
-            executor.submit(process_agenda_events, agenda, center_lat, center_lon, radius_km, days_ahead): agenda
+            executor.submit(process_agenda_events, agenda, center_lat, center_lon, radius_km, days_ahead,
+                            geocode_deadline): agenda
             for agenda in top_agendas
         }
         
@@ -799,11 +1456,180 @@ def fetch_openagenda_events(center_lat, center_lon, radius_km, days_ahead):
             try:
                 events = future.result(timeout=20)
                 all_events.extend(events)
-            except Exception:
-                pass
+            except Exception as e:
+                failed += 1
+                print(f"   ⚠️ Agenda {futures[future].get('uid')}: {e!r}")
     
-    print(f"   ⚡ OpenAgenda: {len(all_events)} événements en {time.time()-start_time:.1f}s")
-    return all_events
+    # Un même événement peut être relayé par plusieurs agendas
+    all_events = dedupe_events(all_events, ('uid', 'begin'))
+    print(f"   ⚡ OpenAgenda: {len(all_events)} événements en {time.time()-start_time:.1f}s"
+          + (f" ({failed} agendas en erreur)" if failed else ""))
+    return all_events, failed == 0
+
+
+# ============================================================================
+# OPENAGENDA : INGESTION EN TABLE (OPENAGENDA_INGEST=1)
+# ============================================================================
+
+OPENAGENDA_EVENT_COLS = (
+    'uid', 'title', 'begin', 'end', 'locationName', 'city', 'address',
+    'latitude', 'longitude', 'distanceKm', 'openagendaUrl', 'agendaTitle', 'source',
+)
+
+
+def fetch_agenda_upcoming_events(uid, days_ahead):
+    """Tous les événements à venir d'un agenda, sans filtre géographique (paginé)."""
+    url = f"{BASE_URL}/agendas/{uid}/events"
+    params = {
+        'key': API_KEY, 'size': 100, 'detailed': 1,
+        'timings[gte]': datetime.now().strftime('%Y-%m-%d'),
+        'timings[lte]': (datetime.now() + timedelta(days=days_ahead)).strftime('%Y-%m-%d'),
+    }
+    
+    events = []
+    for _ in range(OPENAGENDA_INGEST_MAX_PAGES):
+        r = HTTP_SESSION.get(url, params=params, timeout=15)
+        r.raise_for_status()
+        data = orjson.loads(r.content)
+        page = data.get('events') or []
+        events.extend(page)
+        
+        after = data.get('after')
+        if not page or not after:
+            break
+        params['after[]'] = after
+    return events
+
+
+def collect_openagenda_rows():
+    """
+    Lignes (uid → tuple) de la table openagenda_events pour les agendas sélectionnés.
+    Retourne (lignes, uids des agendas dont la lecture a échoué).
+    """
+    top_agendas = select_top_agendas()
+    failed = []
+    
+    def fetch(agenda):
+        try:
+            return fetch_agenda_upcoming_events(agenda.get('uid'), OPENAGENDA_INGEST_DAYS)
+        except Exception as e:
+            print(f"   ⚠️ Ingestion agenda {agenda.get('uid')}: {e}")
+            failed.append(agenda.get('uid'))
+            return []
+    
+    with ThreadPoolExecutor(max_workers=OPENAGENDA_MAX_WORKERS) as executor:
+        agendas_events = list(executor.map(fetch, top_agendas))
+    
+    rows = {}
+    for agenda, events in zip(top_agendas, agendas_events):
+        for ev, loc, ev_lat, ev_lon in locate_agenda_events(events):
+            event = format_agenda_event(ev, loc, ev_lat, ev_lon, agenda.get('slug'), agenda_title_of(agenda))
+            # begin/end : prochaine séance affichée ; end_at : fin de la dernière séance,
+            # pour que l'événement reste lisible tant qu'il lui reste une séance à venir
+            end_at = last_timing_end(ev.get('timings') or []) or event['end']
+            # Un même événement peut être relayé par plusieurs agendas : le premier l'emporte
+            rows.setdefault(event['uid'], (
+                event['uid'], event['title'], event['begin'], event['end'],
+                event['begin'], end_at, event['locationName'], event['city'],
+                event['address'], ev_lat, ev_lon, event['openagendaUrl'], event['agendaTitle'],
+            ))
+    return rows, failed
+
+
+def openagenda_table_fresh():
+    """La table openagenda_events a-t-elle été rafraîchie il y a moins d'un intervalle ?"""
+    with pg_conn() as conn:
+        cur = conn.cursor(cursor_factory=psycopg2.extensions.cursor)
+        cur.execute(
+            "SELECT max(updated_at) > now() - %s * interval '1 second' FROM openagenda_events",
+            (OPENAGENDA_INGEST_INTERVAL * 0.9,)
+        )
+        fresh = cur.fetchone()[0]
+        cur.close()
+    return bool(fresh)
+
+
+def ingest_openagenda_events():
+    """
+    Rafraîchit la table openagenda_events (sautée si elle est encore fraîche).
+    Les appels OpenAgenda et Nominatim, longs, sont faits sans connexion PostgreSQL ;
+    une connexion n'est empruntée que pour le contrôle de fraîcheur puis l'écriture.
+    Retourne le nombre d'événements écrits, ou None si rien n'a été fait.
+    """
+    start_time = time.time()
+    if openagenda_table_fresh():
+        return None
+    
+    rows, failed = collect_openagenda_rows()
+    if not rows:
+        return 0
+    
+    with pg_conn() as conn:
+        cur = conn.cursor(cursor_factory=psycopg2.extensions.cursor)
+        # Verrou de transaction : une seule écriture à la fois, libéré au commit ou au
+        # rollback (y compris si la connexion casse), sans unlock explicite
+        cur.execute("SELECT pg_try_advisory_xact_lock(%s)", (OPENAGENDA_INGEST_LOCK_ID,))
+        if not cur.fetchone()[0]:
+            return None
+        
+        execute_values(cur, """
+            INSERT INTO openagenda_events (uid, title, "begin", "end", begin_at, end_at,
+                                           location_name, city, address, latitude, longitude,
+                                           openagenda_url, agenda_title)
+            VALUES %s
+            ON CONFLICT (uid) DO UPDATE SET
+                title = EXCLUDED.title, "begin" = EXCLUDED."begin", "end" = EXCLUDED."end",
+                begin_at = EXCLUDED.begin_at, end_at = EXCLUDED.end_at,
+                location_name = EXCLUDED.location_name, city = EXCLUDED.city,
+                address = EXCLUDED.address, latitude = EXCLUDED.latitude,
+                longitude = EXCLUDED.longitude, openagenda_url = EXCLUDED.openagenda_url,
+                agenda_title = EXCLUDED.agenda_title, updated_at = now()
+        """, list(rows.values()),
+            template="(%s, %s, %s, %s, %s::timestamptz, %s::timestamptz, %s, %s, %s, %s, %s, %s, %s)",
+            page_size=500)
+        # Événements retirés des agendas (ou passés) depuis la dernière ingestion. Si un
+        # agenda n'a pas pu être lu, ses événements seraient supprimés à tort : on ne
+        # supprime alors que les événements terminés, le reste attend la prochaine ingestion
+        if failed:
+            cur.execute("DELETE FROM openagenda_events WHERE end_at < now()")
+        else:
+            cur.execute("DELETE FROM openagenda_events WHERE updated_at < now()")
+        cur.close()
+    
+    print(f"   ⚡ OpenAgenda ingéré: {len(rows)} événements en {time.time()-start_time:.1f}s"
+          + (f" ({len(failed)} agendas en erreur, purge limitée aux événements passés)" if failed else ""))
+    return len(rows)
+
+
+def openagenda_ingest_loop():
+    """
+    Boucle d'ingestion toutes les OPENAGENDA_INGEST_INTERVAL secondes.
+    Lancée dans un processus à part (ingest_openagenda.py), pas dans les workers web.
+    """
+    while True:
+        try:
+            ingest_openagenda_events()
+        except Exception as e:
+            print(f"   ❌ Erreur ingestion OpenAgenda: {e}")
+        time.sleep(OPENAGENDA_INGEST_INTERVAL)
+
+
+def fetch_openagenda_events_db(center_lat, center_lon, radius_km, days_ahead):
+    """Événements OpenAgenda ingérés, dans le rayon (index GIST sur geog)."""
+    with pg_conn() as conn:
+        cur = conn.cursor(cursor_factory=psycopg2.extensions.cursor)
+        cur.execute("""
+            SELECT uid, title, "begin", "end", location_name, city, address, latitude, longitude,
+                   ROUND((ST_Distance(geog, ST_MakePoint(%s, %s)::geography, false) / 1000)::numeric, 1)::float8,
+                   openagenda_url, agenda_title, 'OpenAgenda'
+            FROM openagenda_events
+            WHERE ST_DWithin(geog, ST_MakePoint(%s, %s)::geography, %s, false)
+              AND (end_at IS NULL OR end_at >= now())
+              AND (begin_at IS NULL OR begin_at < CURRENT_DATE + %s + 1)
+        """, (center_lon, center_lat, center_lon, center_lat, radius_km * 1000, days_ahead))
+        events = [dict(zip(OPENAGENDA_EVENT_COLS, row)) for row in cur]
+        cur.close()
+    return events
 
 
 # ============================================================================
@@ -815,16 +1641,16 @@ def get_cinemas_for_department(dept_id):
     if not ALLOCINE_AVAILABLE:
         return []
     
-    now = time.time()
-    if dept_id in CINEMAS_BY_DEPT_CACHE:
-        if now - CINEMAS_CACHE_TIMESTAMPS.get(dept_id, 0) < CINEMAS_CACHE_DURATION:
-            return CINEMAS_BY_DEPT_CACHE[dept_id]
+    with ALLOCINE_CACHE_LOCK:
+        cinemas = CINEMAS_BY_DEPT_CACHE.get(dept_id)
+    if cinemas is not None:
+        return cinemas
     
     try:
-        api = allocineAPI()
+        api = get_allocine_api()
         cinemas = api.get_cinema(dept_id)
-        CINEMAS_BY_DEPT_CACHE[dept_id] = cinemas
-        CINEMAS_CACHE_TIMESTAMPS[dept_id] = now
+        with ALLOCINE_CACHE_LOCK:
+            CINEMAS_BY_DEPT_CACHE[dept_id] = cinemas
         return cinemas
     except Exception as e:
         print(f"   ⚠️ Erreur get_cinema({dept_id}): {e}")
@@ -855,11 +1681,10 @@ def geocode_cinema(cinema_name, cinema_address, dept_code=None):
         return (lat, lon)
     
     # 2. Coordonnées connues (fallback manuel)
-    name_lower = cinema_name.lower().strip()
-    for known_name, coords in KNOWN_CINEMAS_GPS.items():
-        if known_name in name_lower or name_lower.startswith(known_name[:10]):
-            CINEMA_COORDS_CACHE[cache_key] = coords
-            return coords
+    coords = find_known_cinema_gps(cinema_name.lower().strip())
+    if coords:
+        CINEMA_COORDS_CACHE[cache_key] = coords
+        return coords
     
     # 3. Géocodage Nominatim (dernier recours - plus lent)
     import re
@@ -897,23 +1722,34 @@ def geocode_cinema(cinema_name, cinema_address, dept_code=None):
     return (None, None)
 
 
+def wait_allocine_slot():
+    """Réserve puis attend le prochain créneau Allociné (ALLOCINE_MIN_INTERVAL entre deux appels)."""
+    with ALLOCINE_THROTTLE_LOCK:
+        slot = max(time.monotonic(), ALLOCINE_THROTTLE['last_call'] + ALLOCINE_MIN_INTERVAL)
+        ALLOCINE_THROTTLE['last_call'] = slot
+    wait = slot - time.monotonic()
+    if wait > 0:
+        time.sleep(wait)
+
+
 def fetch_movies_for_cinema(cinema_info, today_str):
     """Worker pour récupérer les films d'un cinéma."""
     try:
-        api = allocineAPI()
+        api = get_allocine_api()
         cinema_id = cinema_info['id']
         
         # Essayer d'abord get_showtime (plus fiable)
         try:
+            wait_allocine_slot()
             showtimes = api.get_showtime(cinema_id, today_str)
             
-            # DEBUG: Voir ce que retourne l'API
+            # DEBUG: Voir ce que retourne l'API (LOG_LEVEL=DEBUG ; arguments
+            # formatés seulement si le niveau est actif, jamais le dict complet sinon)
             if showtimes:
-                print(f"      📋 {cinema_id}: {len(showtimes)} films reçus")
-                if len(showtimes) > 0:
-                    print(f"         Exemple: {showtimes[0]}")
+                logger.debug("📋 %s: %d films reçus", cinema_id, len(showtimes))
+                logger.debug("   Exemple: %r", showtimes[0])
             else:
-                print(f"      📋 {cinema_id}: showtimes vide ou None")
+                logger.debug("📋 %s: showtimes vide ou None", cinema_id)
             
             if showtimes:
                 movies = []
@@ -984,6 +1820,7 @@ def fetch_movies_for_cinema(cinema_info, today_str):
         
         # Fallback sur get_movies (données enrichies mais moins fiable)
         try:
+            wait_allocine_slot()
             movies = api.get_movies(cinema_id, today_str)
             if movies:
                 print(f"      📋 {cinema_id}: get_movies retourne {len(movies)} films")
@@ -1003,50 +1840,123 @@ def fetch_movies_for_cinema(cinema_info, today_str):
 # ============================================================================
 
 CINEMAS_ALLOCINE_DATA = []
+# Coordonnées des cinémas géolocalisés en tableaux NumPy : (indices, lats, lons)
+CINEMAS_ALLOCINE_COORDS = (np.empty(0, dtype=np.intp), np.empty(0), np.empty(0))
+CINEMAS_ALLOCINE_LOCK = threading.Lock()
 
 def load_cinemas_allocine():
     """Charge la base complète des cinémas Allociné avec GPS."""
-    global CINEMAS_ALLOCINE_DATA
-    try:
-        allocine_file = os.path.join(os.path.dirname(__file__), 'cinemas_france_data.json')
-        if os.path.exists(allocine_file):
-            with open(allocine_file, 'r', encoding='utf-8') as f:
-                CINEMAS_ALLOCINE_DATA = json.load(f)
-            print(f"✅ Cinémas Allociné chargés: {len(CINEMAS_ALLOCINE_DATA)}")
-        else:
-            print(f"⚠️ Fichier cinemas_france_data.json non trouvé")
-    except Exception as e:
-        print(f"❌ Erreur chargement cinémas Allociné: {e}")
+    global CINEMAS_ALLOCINE_DATA, CINEMAS_ALLOCINE_COORDS
+    with CINEMAS_ALLOCINE_LOCK:
+        if CINEMAS_ALLOCINE_DATA:
+            return
+        
+        try:
+            allocine_file = os.path.join(os.path.dirname(__file__), 'cinemas_france_data.json')
+            if os.path.exists(allocine_file):
+                with open(allocine_file, 'rb') as f:
+                    data = orjson.loads(f.read())
+                indices = [i for i, c in enumerate(data) if c.get('lat') and c.get('lon')]
+                CINEMAS_ALLOCINE_COORDS = (
+                    np.array(indices, dtype=np.intp),
+                    np.array([data[i]['lat'] for i in indices], dtype=np.float64),
+                    np.array([data[i]['lon'] for i in indices], dtype=np.float64),
+                )
+                CINEMAS_ALLOCINE_DATA = data
+                print(f"✅ Cinémas Allociné chargés: {len(CINEMAS_ALLOCINE_DATA)}")
+            else:
+                print(f"⚠️ Fichier cinemas_france_data.json non trouvé")
+        except Exception as e:
+            print(f"❌ Erreur chargement cinémas Allociné: {e}")
 
 
-# Cache des films par cinéma (TTL 1h)
-FILMS_CACHE = {}  # {cinema_id: {'films': [...], 'timestamp': datetime}}
+# Cache des films par cinéma (TTL 1h, borné en taille)
 FILMS_CACHE_TTL = 3600  # 1 heure
+FILMS_CACHE = TTLCache(maxsize=4096, ttl=FILMS_CACHE_TTL)  # {cinema_id: [films]}
+FILMS_CACHE_LOCK = threading.Lock()
+# Appels get_showtime/get_movies simultanés ; le débit reste borné par wait_allocine_slot,
+# 4 threads suffisent à recouvrir la latence d'un appel
+ALLOCINE_MAX_WORKERS = 4
+# Pool permanent : ses threads gardent leur instance allocineAPI entre les requêtes
+ALLOCINE_EXECUTOR = ThreadPoolExecutor(max_workers=ALLOCINE_MAX_WORKERS, thread_name_prefix="allocine")
 
 
 def get_films_cached(cinema, today_str):
     """Récupère les films avec cache."""
     cinema_id = cinema['id']
-    now = time.time()
     
     # Vérifier le cache
-    if cinema_id in FILMS_CACHE:
-        cached = FILMS_CACHE[cinema_id]
-        if now - cached['timestamp'] < FILMS_CACHE_TTL:
-            return cached['films']
+    with FILMS_CACHE_LOCK:
+        cached = FILMS_CACHE.get(cinema_id)
+    if cached is not None:
+        return cached
     
     # Pas en cache ou expiré -> requête API
     cinema_info, films = fetch_movies_for_cinema(cinema, today_str)
     
     # Stocker en cache
-    FILMS_CACHE[cinema_id] = {
-        'films': films,
-        'timestamp': now
-    }
+    with FILMS_CACHE_LOCK:
+        FILMS_CACHE[cinema_id] = films
     
     return films
 
 
+def get_films_for_cinemas(cinemas, today_str):
+    """
+    Films de plusieurs cinémas : FILMS_CACHE d'abord, puis les appels Allociné
+    manquants en parallèle sur ALLOCINE_EXECUTOR.
+    Retourne [(cinema_info, movies, from_cache)] dans l'ordre de `cinemas`.
+    """
+    results = [None] * len(cinemas)
+    to_fetch = []
+    with FILMS_CACHE_LOCK:
+        for i, cinema in enumerate(cinemas):
+            cached = FILMS_CACHE.get(cinema['id'])
+            if cached is not None:
+                results[i] = (cinema, cached, True)
+            else:
+                to_fetch.append(i)
+    
+    if to_fetch:
+        fetched = ALLOCINE_EXECUTOR.map(lambda i: fetch_movies_for_cinema(cinemas[i], today_str), to_fetch)
+        for i, (cinema_info, movies) in zip(to_fetch, fetched):
+            with FILMS_CACHE_LOCK:
+                FILMS_CACHE[cinemas[i]['id']] = movies
+            results[i] = (cinema_info, movies, False)
+    
+    return results
+
+
+def search_cinemas_nearby(center_lat, center_lon, radius_km):
+    """
+    Recherche spatiale dans la base cinémas : une seule passe NumPy
+    sur toutes les coordonnées. Retourne (positions triées par distance, distances),
+    sans construire de dict : voir cinema_entries().
+    """
+    indices, lats, lons = CINEMAS_ALLOCINE_COORDS
+    dists = haversine_km_array(center_lat, center_lon, lats, lons)
+    hits = np.nonzero(dists <= radius_km)[0]
+    hits = hits[np.argsort(dists[hits], kind='stable')]
+    return hits, dists
+
+
+def cinema_entries(hits, dists):
+    """Dicts des cinémas retenus (appelé sur la tranche utile uniquement)."""
+    indices = CINEMAS_ALLOCINE_COORDS[0]
+    nearby_cinemas = []
+    for i in hits.tolist():
+        cinema = CINEMAS_ALLOCINE_DATA[indices[i]]
+        nearby_cinemas.append({
+            'id': cinema['id'],
+            'name': cinema['name'],
+            'address': cinema.get('address', ''),
+            'lat': cinema['lat'],
+            'lon': cinema['lon'],
+            'distance': float(dists[i])
+        })
+    return nearby_cinemas
+
+
 def fetch_allocine_cinemas_nearby(center_lat, center_lon, radius_km, max_cinemas=10):
     """
     🚀 VERSION ULTRA-OPTIMISÉE
@@ -1073,34 +1983,17 @@ def fetch_allocine_cinemas_nearby(center_lat, center_lon, radius_km, max_cinemas
         return []
     
     # 1. Recherche spatiale (instantané)
-    nearby_cinemas = []
-    for cinema in CINEMAS_ALLOCINE_DATA:
-        lat = cinema.get('lat')
-        lon = cinema.get('lon')
-        if not lat or not lon:
-            continue
-        
-        dist = haversine_km(center_lat, center_lon, lat, lon)
-        if dist <= radius_km:
-            nearby_cinemas.append({
-                'id': cinema['id'],
-                'name': cinema['name'],
-                'address': cinema.get('address', ''),
-                'lat': lat,
-                'lon': lon,
-                'distance': dist
-            })
-    
-    nearby_cinemas.sort(key=lambda c: c['distance'])
-    print(f"   📍 {len(nearby_cinemas)} cinémas trouvés")
+    hits, dists = search_cinemas_nearby(center_lat, center_lon, radius_km)
+    print(f"   📍 {len(hits)} cinémas trouvés")
     
-    if not nearby_cinemas:
+    if not len(hits):
         return []
     
     # Limiter
-    if len(nearby_cinemas) > max_cinemas:
-        nearby_cinemas = nearby_cinemas[:max_cinemas]
+    if len(hits) > max_cinemas:
+        hits = hits[:max_cinemas]
         print(f"   📍 Limité à {max_cinemas} cinémas")
+    nearby_cinemas = cinema_entries(hits, dists)
     
     # 2. Récupérer les films (avec cache)
     today_str = date.today().strftime("%Y-%m-%d")
@@ -1109,30 +2002,11 @@ def fetch_allocine_cinemas_nearby(center_lat, center_lon, radius_km, max_cinemas
     
     print(f"   🎬 Récupération des films...")
     
-    for i, cinema in enumerate(nearby_cinemas):
+    for cinema_info, movies, from_cache in get_films_for_cinemas(nearby_cinemas, today_str):
         try:
-            cinema_id = cinema['id']
-            now = time.time()
-            
-            # Vérifier le cache
-            from_cache = False
-            if cinema_id in FILMS_CACHE:
-                cached = FILMS_CACHE[cinema_id]
-                if now - cached['timestamp'] < FILMS_CACHE_TTL:
-                    movies = cached['films']
-                    from_cache = True
-                    cache_hits += 1
-            
-            if not from_cache:
-                # Requête API
-                cinema_info, movies = fetch_movies_for_cinema(cinema, today_str)
-                # Stocker en cache
-                FILMS_CACHE[cinema_id] = {'films': movies, 'timestamp': now}
-                # Délai seulement si pas de cache
-                if i < len(nearby_cinemas) - 1:
-                    time.sleep(0.15)
-            else:
-                cinema_info = cinema
+            cinema = cinema_info
+            if from_cache:
+                cache_hits += 1
             
             if movies:
                 cache_icon = "💾" if from_cache else "🎬"
@@ -1223,37 +2097,45 @@ def get_dept_name_from_code(dept_code):
     return DEPT_NAMES.get(str(dept_code), '')
 
 
+def remove_accents(text):
+    """Supprime les accents d'un texte."""
+    return ''.join(
+        c for c in unicodedata.normalize('NFD', text)
+        if unicodedata.category(c) != 'Mn'
+    )
+
+
+CINEMA_STOP_WORDS = frozenset({'le', 'la', 'les', 'du', 'de', 'des', 'sur', 'en', 'et'})
+
+
+@functools.lru_cache(maxsize=8192)
+def extract_keywords(name):
+    """
+    Extrait les mots-clés d'un nom (sans accents, sans mots vides).
+    Mis en cache : les noms Allociné sont re-tokenisés à chaque recherche sinon.
+    """
+    name_lower = name.lower().strip()
+    name_no_accents = remove_accents(name_lower)
+    # Remplacer les tirets et caractères spéciaux par des espaces
+    name_normalized = re.sub(r'[^a-z0-9]+', ' ', name_no_accents)
+    name_normalized = re.sub(r'\s+', ' ', name_normalized).strip()
+    
+    # Supprimer les mots vides courts uniquement
+    keywords = frozenset(name_normalized.split()) - CINEMA_STOP_WORDS
+    return keywords, name_normalized
+
+
 def find_allocine_match(cnc_cinema, allocine_cinemas):
     """
     Trouve la correspondance entre un cinéma CNC et la liste Allociné.
     Utilise les mots-clés et le nom normalisé (sans accents).
     """
-    import re
-    import unicodedata
-    
-    def remove_accents(text):
-        """Supprime les accents d'un texte."""
-        return ''.join(
-            c for c in unicodedata.normalize('NFD', text)
-            if unicodedata.category(c) != 'Mn'
-        )
-    
-    def extract_keywords(name):
-        """Extrait les mots-clés d'un nom (sans accents, sans mots vides)."""
-        name_lower = name.lower().strip()
-        name_no_accents = remove_accents(name_lower)
-        # Remplacer les tirets et caractères spéciaux par des espaces
-        name_normalized = re.sub(r'[^a-z0-9]+', ' ', name_no_accents)
-        name_normalized = re.sub(r'\s+', ' ', name_normalized).strip()
-        
-        keywords = set(name_normalized.split())
-        # Supprimer les mots vides courts uniquement
-        stop_words = {'le', 'la', 'les', 'du', 'de', 'des', 'sur', 'en', 'et'}
-        keywords -= stop_words
-        return keywords, name_normalized
-    
     cnc_keywords, cnc_norm = extract_keywords(cnc_cinema['nom'])
     cnc_commune_norm = remove_accents(cnc_cinema.get('commune', '').lower())
+    check_commune = bool(cnc_commune_norm) and len(cnc_commune_norm) > 3
+    
+    # Score d'un nom identique avec tous les bonus : rien ne peut faire mieux
+    max_score = len(cnc_keywords) * 10 + 100 + (30 if check_commune else 0)
     
     best_match = None
     best_score = 0
@@ -1287,11 +2169,14 @@ def find_allocine_match(cnc_cinema, allocine_cinemas):
             score += 50
         
         # Bonus si commune dans le nom Allociné
-        if cnc_commune_norm and len(cnc_commune_norm) > 3:
+        if check_commune:
             alloc_norm_for_commune = remove_accents(alloc_name.lower())
             if cnc_commune_norm in alloc_norm_for_commune:
                 score += 30
         
+        if score == max_score:
+            return alloc_cinema
+        
         if score > best_score:
             best_score = score
             best_match = alloc_cinema
@@ -1304,34 +2189,95 @@ def find_allocine_match(cnc_cinema, allocine_cinemas):
 # PARALLÉLISATION TOTALE
 # ============================================================================
 
+def nearby_cache_key(center_lat, center_lon, radius_km, days_ahead):
+    """Clé de cache : centre quantifié sur une grille de 0.01° (~1 km)."""
+    return f"nearby:{round(center_lat, 2)}:{round(center_lon, 2)}:{radius_km}:{days_ahead}"
+
+
+def nearby_cache_get(key):
+    """
+    Lit (events, count, sources) en cache, ou None.
+    Depuis Redis, events est le JSON brut (orjson.Fragment) : il est recopié
+    tel quel dans la réponse, sans être décodé puis réencodé.
+    """
+    if SHARED_REDIS is not None:
+        try:
+            events, meta = SHARED_REDIS.mget(key, f"{key}:meta")
+            if events is None or meta is None:
+                return None
+            meta = orjson.loads(meta)
+            return orjson.Fragment(events), meta['count'], meta['sources']
+        except Exception as e:
+            print(f"   ⚠️ Erreur Redis: {e}")
+            return None
+    with NEARBY_CACHE_LOCK:
+        cached = NEARBY_CACHE.get(key)
+    if cached is None:
+        return None
+    events, sources = cached
+    return events, len(events), sources
+
+
+def nearby_cache_set(key, events, sources):
+    """Stocke events et sources pour NEARBY_CACHE_TTL secondes."""
+    if SHARED_REDIS is not None:
+        try:
+            pipe = SHARED_REDIS.pipeline()
+            pipe.setex(key, NEARBY_CACHE_TTL, orjson.dumps(events, default=orjson_default, option=ORJSON_OPTIONS))
+            pipe.setex(f"{key}:meta", NEARBY_CACHE_TTL, orjson.dumps({"count": len(events), "sources": sources}))
+            pipe.execute()
+        except Exception as e:
+            print(f"   ⚠️ Erreur Redis: {e}")
+        return
+    with NEARBY_CACHE_LOCK:
+        NEARBY_CACHE[key] = (events, sources)
+
+
+# Échéance unique des deux sources de /api/events/nearby, comptée depuis leur lancement
+NEARBY_SOURCES_TIMEOUT = 25  # secondes
+
+
 def fetch_all_events_parallel(center_lat, center_lon, radius_km, days_ahead):
-    """Exécute DATAtourisme ET OpenAgenda en parallèle."""
+    """
+    Exécute DATAtourisme ET OpenAgenda en parallèle.
+    Retourne (événements, compteurs par source, complet) : complet est faux dès
+    qu'une source a échoué, expiré ou répondu partiellement.
+    """
     print(f"🔍 Recherche parallèle: ({center_lat}, {center_lon}), {radius_km}km, {days_ahead}j")
     
     all_events = []
     sources_count = {}
-    
-    with ThreadPoolExecutor(max_workers=2) as executor:
-        future_dt = executor.submit(fetch_datatourisme_events, center_lat, center_lon, radius_km, days_ahead)
-        future_oa = executor.submit(fetch_openagenda_events, center_lat, center_lon, radius_km, days_ahead)
-        
-        try:
-            dt_events = future_dt.result(timeout=10)
-            sources_count['DATAtourisme'] = len(dt_events)
-            all_events.extend(dt_events)
-        except Exception as e:
-            print(f"   ⚠️ Erreur DATAtourisme: {e}")
-            sources_count['DATAtourisme'] = 0
-        
+    complete = True
+    
+    # Exécuteur propre à la requête : pas de file d'attente partagée entre requêtes.
+    # shutdown(wait=False) : une source en retard finit en arrière-plan sans bloquer la réponse
+    executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="sources")
+    futures = {
+        'DATAtourisme': executor.submit(fetch_datatourisme_events, center_lat, center_lon, radius_km, days_ahead),
+        'OpenAgenda': executor.submit(fetch_openagenda_events, center_lat, center_lon, radius_km, days_ahead),
+    }
+    wait_futures(futures.values(), timeout=NEARBY_SOURCES_TIMEOUT)
+    executor.shutdown(wait=False)
+    
+    for source, future in futures.items():
+        if not future.done():
+            print(f"   ⚠️ {source}: pas de réponse en {NEARBY_SOURCES_TIMEOUT}s")
+            sources_count[source] = 0
+            complete = False
+            continue
         try:
-            oa_events = future_oa.result(timeout=25)
-            sources_count['OpenAgenda'] = len(oa_events)
-            all_events.extend(oa_events)
+            events = future.result()
+            if source == 'OpenAgenda':
+                events, source_complete = events
+                complete = complete and source_complete
+            sources_count[source] = len(events)
+            all_events.extend(events)
         except Exception as e:
-            print(f"   ⚠️ Erreur OpenAgenda: {e}")
-            sources_count['OpenAgenda'] = 0
+            print(f"   ⚠️ Erreur {source}: {e!r}")
+            sources_count[source] = 0
+            complete = False
     
-    return all_events, sources_count
+    return all_events, sources_count, complete
 
 
 # ============================================================================
@@ -1355,10 +2301,28 @@ def get_nearby_events():
         if center_lat is None or center_lon is None:
             return jsonify({"status": "error", "message": "Paramètres 'lat' et 'lon' requis"}), 400
         
-        all_events, sources = fetch_all_events_parallel(center_lat, center_lon, radius_km, days_ahead)
-        all_events.sort(key=lambda e: (e.get("distanceKm") or 999, e.get("begin") or ""))
+        if abs(center_lat) > MAX_ABS_LAT or radius_km > MAX_RADIUS_KM:
+            return jsonify({"status": "error", "message": f"'lat' doit être dans ±{MAX_ABS_LAT}° et 'radiusKm' ≤ {MAX_RADIUS_KM}"}), 400
         
-        print(f"✅ Total: {len(all_events)} événements")
+        cache_key = nearby_cache_key(center_lat, center_lon, radius_km, days_ahead)
+        cached = nearby_cache_get(cache_key)
+        if cached is not None:
+            all_events, count, sources = cached
+            cache_status = 'HIT'
+        else:
+            all_events, sources, complete = fetch_all_events_parallel(center_lat, center_lon, radius_km, days_ahead)
+            all_events = dedupe_events(all_events, ('source', 'uid'))
+            # Tri complet (pas de heapq.merge) : le bloc DATAtourisme, déjà dans cet
+            # ordre, est une seule séquence pour Timsort qui y fusionne OpenAgenda
+            all_events.sort(key=event_sort_key)
+            count = len(all_events)
+            # Une source en erreur ou en retard : réponse servie mais pas mise en cache,
+            # pour ne pas la resservir à toute la cellule pendant NEARBY_CACHE_TTL
+            if complete:
+                nearby_cache_set(cache_key, all_events, sources)
+            cache_status = 'MISS'
+        
+        print(f"✅ Total: {count} événements (cache {cache_status})")
         
         return jsonify({
             "status": "success",
@@ -1366,9 +2330,9 @@ def get_nearby_events():
             "radiusKm": radius_km,
             "days": days_ahead,
             "events": all_events,
-            "count": len(all_events),
+            "count": count,
             "sources": sources
-        }), 200
+        }), 200, {"X-Cache": cache_status}
         
     except Exception as e:
         print(f"❌ Erreur: {e}")
@@ -1398,30 +2362,13 @@ def get_nearby_cinema():
             return jsonify({"status": "success", "events": [], "count": 0, "hasMore": False}), 200
         
         # Recherche spatiale (très rapide ~2ms)
-        nearby_cinemas = []
-        for cinema in CINEMAS_ALLOCINE_DATA:
-            lat = cinema.get('lat')
-            lon = cinema.get('lon')
-            if not lat or not lon:
-                continue
-            dist = haversine_km(center_lat, center_lon, lat, lon)
-            if dist <= radius_km:
-                nearby_cinemas.append({
-                    'id': cinema['id'],
-                    'name': cinema['name'],
-                    'address': cinema.get('address', ''),
-                    'lat': lat,
-                    'lon': lon,
-                    'distance': dist
-                })
-        
-        nearby_cinemas.sort(key=lambda c: c['distance'])
-        total_cinemas = len(nearby_cinemas)
-        
-        # Pagination
+        hits, dists = search_cinemas_nearby(center_lat, center_lon, radius_km)
+        total_cinemas = len(hits)
+        
+        # Pagination : seuls les cinémas du batch sont mis en forme
         start_idx = batch * batch_size
         end_idx = start_idx + batch_size
-        cinemas_batch = nearby_cinemas[start_idx:end_idx]
+        cinemas_batch = cinema_entries(hits[start_idx:end_idx], dists)
         has_more = end_idx < total_cinemas and end_idx < 20  # Max 20 cinémas total
         
         if not cinemas_batch:
@@ -1442,25 +2389,10 @@ def get_nearby_cinema():
         cache_hits = 0
         start_time = time.time()
         
-        for i, cinema in enumerate(cinemas_batch):
+        for cinema, movies, from_cache in get_films_for_cinemas(cinemas_batch, today_str):
             try:
-                cinema_id = cinema['id']
-                now = time.time()
-                
-                # Vérifier le cache
-                from_cache = False
-                if cinema_id in FILMS_CACHE:
-                    cached = FILMS_CACHE[cinema_id]
-                    if now - cached['timestamp'] < FILMS_CACHE_TTL:
-                        movies = cached['films']
-                        from_cache = True
-                        cache_hits += 1
-                
-                if not from_cache:
-                    cinema_info, movies = fetch_movies_for_cinema(cinema, today_str)
-                    FILMS_CACHE[cinema_id] = {'films': movies, 'timestamp': now}
-                    if i < len(cinemas_batch) - 1:
-                        time.sleep(0.15)
+                if from_cache:
+                    cache_hits += 1
                 
                 if movies:
                     for movie in movies:
@@ -1531,42 +2463,55 @@ def get_nearby_cinema():
 # ============================================================================
 
 SALONS_DATA = []
+# Coordonnées des salons géolocalisés en tableaux NumPy : (indices, lats, lons)
+SALONS_COORDS = (np.empty(0, dtype=np.intp), np.empty(0), np.empty(0))
+SALONS_LOCK = threading.Lock()
 
 def load_salons_data():
     """Charge les données des salons depuis le fichier JSON."""
-    global SALONS_DATA
-    try:
-        import os
-        salons_file = os.path.join(os.path.dirname(__file__), 'salons_france.json')
-        if os.path.exists(salons_file):
-            with open(salons_file, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-            
-            # Gérer les deux formats possibles
-            if isinstance(data, list):
-                # Format attendu: liste de salons
-                SALONS_DATA = data
-            elif isinstance(data, dict) and 'events' in data:
-                # Format eventseye: {"events": [...]}
-                SALONS_DATA = data['events']
-            else:
-                print(f"⚠️ Format de fichier salons inconnu: {type(data)}")
-                SALONS_DATA = []
-            
-            # Vérifier que les éléments sont des dicts
-            if SALONS_DATA and not isinstance(SALONS_DATA[0], dict):
-                print(f"⚠️ Format invalide: les salons ne sont pas des dictionnaires")
-                print(f"   Type premier élément: {type(SALONS_DATA[0])}")
-                print(f"   Contenu: {str(SALONS_DATA[0])[:100]}")
-                SALONS_DATA = []
+    global SALONS_DATA, SALONS_COORDS
+    with SALONS_LOCK:
+        if SALONS_DATA:
+            return
+        
+        try:
+            import os
+            salons_file = os.path.join(os.path.dirname(__file__), 'salons_france.json')
+            if os.path.exists(salons_file):
+                with open(salons_file, 'rb') as f:
+                    data = orjson.loads(f.read())
+                
+                # Gérer les deux formats possibles
+                if isinstance(data, list):
+                    # Format attendu: liste de salons
+                    salons = data
+                elif isinstance(data, dict) and 'events' in data:
+                    # Format eventseye: {"events": [...]}
+                    salons = data['events']
+                else:
+                    print(f"⚠️ Format de fichier salons inconnu: {type(data)}")
+                    salons = []
+                
+                # Vérifier que les éléments sont des dicts
+                if salons and not isinstance(salons[0], dict):
+                    print(f"⚠️ Format invalide: les salons ne sont pas des dictionnaires")
+                    print(f"   Type premier élément: {type(salons[0])}")
+                    print(f"   Contenu: {str(salons[0])[:100]}")
+                else:
+                    indices = [i for i, salon in enumerate(salons) if salon.get('lat') and salon.get('lon')]
+                    SALONS_COORDS = (
+                        np.array(indices, dtype=np.intp),
+                        np.array([salons[i]['lat'] for i in indices], dtype=np.float64),
+                        np.array([salons[i]['lon'] for i in indices], dtype=np.float64),
+                    )
+                    SALONS_DATA = salons
+                    print(f"✅ Salons chargés: {len(SALONS_DATA)}")
             else:
-                print(f"✅ Salons chargés: {len(SALONS_DATA)}")
-        else:
-            print(f"⚠️ Fichier salons_france.json non trouvé")
-    except Exception as e:
-        print(f"❌ Erreur chargement salons: {e}")
-        import traceback
-        traceback.print_exc()
+                print(f"⚠️ Fichier salons_france.json non trouvé")
+        except Exception as e:
+            print(f"❌ Erreur chargement salons: {e}")
+            import traceback
+            traceback.print_exc()
 
 
 def parse_salon_date(date_str):
@@ -1635,17 +2580,14 @@ def get_nearby_salons():
         today = date.today()
         nearby_salons = []
         
-        for salon in SALONS_DATA:
-            lat = salon.get('lat')
-            lon = salon.get('lon')
-            
-            if not lat or not lon:
-                continue
-            
-            # Filtrer par distance
-            dist = haversine_km(center_lat, center_lon, lat, lon)
-            if dist > radius_km:
-                continue
+        # Filtrer par distance : une seule passe NumPy sur tous les salons géolocalisés
+        indices, lats, lons = SALONS_COORDS
+        dists = haversine_km_array(center_lat, center_lon, lats, lons)
+        hits = np.nonzero(dists <= radius_km)[0]
+        
+        for i, dist in zip(hits.tolist(), dists[hits].tolist()):
+            salon = SALONS_DATA[indices[i]]
+            lat, lon = salon['lat'], salon['lon']
             
             # Filtrer les salons passés
             salon_date = parse_salon_date(salon.get('dates', ''))
@@ -1698,8 +2640,7 @@ def debug_allocine_depts():
         return jsonify({"status": "error", "message": "Allociné API non disponible"}), 500
     
     try:
-        api = allocineAPI()
-        depts = api.get_departements()
+        depts = get_allocine_departements()
         
         # Trier par nom pour faciliter la lecture
         depts_sorted = sorted(depts, key=lambda d: d.get('name', ''))
@@ -1736,29 +2677,35 @@ def debug_allocine_depts():
 def get_stats():
     """Statistiques de la base."""
     try:
-        conn = get_db_connection()
-        cur = conn.cursor()
-        
-        cur.execute("SELECT COUNT(*) as total FROM evenements")
-        total = cur.fetchone()['total']
-        
-        cur.execute("SELECT COUNT(*) as count FROM evenements WHERE date_debut >= CURRENT_DATE")
-        futurs = cur.fetchone()['count']
-        
-        cur.execute("""
-            SELECT commune, COUNT(*) as count FROM evenements
-            WHERE commune IS NOT NULL GROUP BY commune ORDER BY count DESC LIMIT 10
-        """)
-        top_communes = cur.fetchall()
-        
-        cur.close()
-        conn.close()
+        with pg_conn() as conn:
+            cur = conn.cursor()
+            
+            # Total et événements à venir en un seul parcours de la table
+            cur.execute("""
+                SELECT COUNT(*) as total, COUNT(*) FILTER (WHERE date_debut >= CURRENT_DATE) as count
+                FROM evenements
+            """)
+            counts = cur.fetchone()
+            total, futurs = counts['total'], counts['count']
+            
+            # Liste déjà sérialisée en JSON par PostgreSQL, insérée telle quelle (orjson.Fragment)
+            cur.execute("""
+                SELECT COALESCE(json_agg(json_build_object('commune', commune, 'count', count)
+                                         ORDER BY count DESC), '[]')::text AS top_communes
+                FROM (
+                    SELECT commune, COUNT(*) as count FROM evenements
+                    WHERE commune IS NOT NULL GROUP BY commune ORDER BY count DESC LIMIT 10
+                ) t
+            """)
+            top_communes = orjson.Fragment(cur.fetchone()['top_communes'])
+            
+            cur.close()
         
         return jsonify({
             "status": "success",
             "total_events": total,
             "upcoming_events": futurs,
-            "top_communes": [dict(row) for row in top_communes],
+            "top_communes": top_communes,
             "sources": ["DATAtourisme", "OpenAgenda", "Allociné (optimisé)"]
         }), 200
         
@@ -1770,11 +2717,10 @@ def get_stats():
 def health():
     """Health check."""
     try:
-        conn = get_db_connection()
-        cur = conn.cursor()
-        cur.execute("SELECT 1")
-        cur.close()
-        conn.close()
+        with pg_conn() as conn:
+            cur = conn.cursor()
+            cur.execute("SELECT 1")
+            cur.close()
         
         return jsonify({
             "status": "healthy",
@@ -1787,6 +2733,21 @@ def health():
         return jsonify({"status": "unhealthy", "database": "disconnected", "error": str(e)}), 500
 
 
+# ============================================================================
+# DÉMARRAGE
+# ============================================================================
+
+def warm_caches():
+    """
+    Charge les données et caches partagés avant la première requête.
+    Appelé au lancement direct et par gunicorn dans chaque worker (gunicorn.conf.py).
+    """
+    load_cinema_coords_cache()
+    load_cinemas_cnc()
+    load_cinemas_allocine()
+    load_salons_data()
+
+
 # ============================================================================
 # MAIN
 # ============================================================================
@@ -1800,15 +2761,8 @@ if __name__ == '__main__':
     print(f"Port: {port}")
     print(f"Database: {DB_CONFIG['database']}@{DB_CONFIG['host']}")
     
-    # Charger les caches au démarrage
-    load_cinema_coords_cache()
-    
-    # Charger la base CNC des cinémas français
-    load_cinemas_cnc()
-    
-    # Charger le mapping Allociné dynamiquement
-    if ALLOCINE_AVAILABLE:
-        load_allocine_departments()
+    # Charger les caches et bases cinémas/salons au démarrage
+    warm_caches()
     
     print("Optimisations:")
     print("  ✅ BASE CNC: 2053 cinémas français avec GPS")
@@ -1817,4 +2771,6 @@ if __name__ == '__main__':
     print("  ✅ Parallélisation DATAtourisme + OpenAgenda")
     print("=" * 70)
     
-    app.run(host='0.0.0.0', port=port, debug=True)
+    # Serveur de développement uniquement (en production : gunicorn, cf. gunicorn.conf.py).
+    # FLASK_DEBUG=1 active le debugger et le rechargement automatique.
+    app.run(host='0.0.0.0', port=port, debug=os.environ.get("FLASK_DEBUG", "0") == "1", threaded=True)